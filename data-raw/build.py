@@ -0,0 +1,256 @@
+"""Build every export of the data-raw tables, redoing only what changed.
+
+Stages:
+
+    records      docs/data/babynamesIL.json, docs/data/babynamesIL_totals.json
+    site         docs/data.json, docs/data.json.gz
+    shards       docs/data/shards/*.json, docs/data/manifest.json
+    cache        binary caches of the tables in data-raw/cache
+    highlights   highlights pickle in data-raw/cache
+    analytics    analytics pickle in data-raw/cache
+
+Every stage declares its input files (data and code). After a successful
+run the SHA-256 of each input is recorded in data-raw/cache/build-state.json,
+with the outputs the stage wrote. The highlights and analytics pickles are
+named by a hash of the tables, so those stages report the exact file. A stage
+whose inputs hash the same and whose recorded outputs exist is skipped; one
+that did not write its outputs (e.g. a table is missing) is reported as
+skipped and runs again next time. The app judges its binary caches by the
+same hash of the CSVs (data_paths.file_hash), so a CSV rewritten with the
+same content is up to date for both. The stages are independent and run in
+parallel on a process pool.
+Run from anywhere:
+
+    python data-raw/build.py                  # build what changed
+    python data-raw/build.py site shards      # only these stages
+    python data-raw/build.py --force          # rebuild everything
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+DATA_RAW_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(DATA_RAW_DIR)
+STREAMLIT_DIR = os.path.join(REPO_DIR, "streamlit")
+sys.path.insert(0, STREAMLIT_DIR)
+
+# Paths below are relative to the repository root, where the stages run
+from data_paths import CACHE_DIR, DATASETS, DOCS_DIR, TABLES, file_hash  # noqa: E402
+
+STATE_PATH = os.path.join(REPO_DIR, CACHE_DIR, "build-state.json")
+BABYNAMES_CSV = DATASETS["babynames"]
+TOTALS_CSV = DATASETS["totals"]
+
+
+def build_records():
+    from to_json import export_records
+
+    export_records()
+
+
+def build_site():
+    from convert_to_json import convert_data_for_static_site
+
+    convert_data_for_static_site()
+
+
+def build_shards():
+    from convert_to_json import export_shards
+
+    export_shards()
+
+
+def build_cache():
+    from data_cache import build_caches
+
+    build_caches()
+
+
+def build_highlights():
+    """Returns the pickle written, named by a hash of the tables."""
+    # Tables are read from the CSVs, not the binary cache, so this stage does
+    # not depend on the cache stage running first
+    from data_cache import pickle_path, read_csv, share_categories
+    from highlights import load_highlights
+
+    tables = share_categories([read_csv(BABYNAMES_CSV), read_csv(TOTALS_CSV)])
+    load_highlights(*tables)
+    return [pickle_path("highlights", tables)]
+
+
+def build_analytics():
+    """Returns the pickle written, named by a hash of the table."""
+    from analytics import load_analytics
+    from data_cache import pickle_path, read_csv
+
+    babynames = read_csv(BABYNAMES_CSV)
+    load_analytics(babynames)
+    return [pickle_path("analytics", [babynames])]
+
+
+# The exports and the paths they read and write
+EXPORT_CODE = ["data-raw/convert_to_json.py", "streamlit/data_paths.py"]
+# The tables as the app loads them: schema, shared dictionaries, hashing
+DATA_CACHE_CODE = ["streamlit/data_cache.py", "streamlit/data_paths.py"]
+
+# name: (function, inputs, outputs). A function that returns its outputs
+# needs none declared here.
+STAGES = {
+    "records": (
+        build_records,
+        [BABYNAMES_CSV, TOTALS_CSV, "data-raw/to_json.py"] + EXPORT_CODE,
+        [
+            os.path.join(DOCS_DIR, "data", "babynamesIL.json"),
+            os.path.join(DOCS_DIR, "data", "babynamesIL_totals.json"),
+        ],
+    ),
+    "site": (
+        build_site,
+        [BABYNAMES_CSV, TOTALS_CSV] + EXPORT_CODE,
+        [os.path.join(DOCS_DIR, "data.json"), os.path.join(DOCS_DIR, "data.json.gz")],
+    ),
+    "shards": (
+        build_shards,
+        [BABYNAMES_CSV, TOTALS_CSV] + EXPORT_CODE,
+        [os.path.join(DOCS_DIR, "data", "manifest.json")],
+    ),
+    "cache": (
+        build_cache,
+        TABLES + DATA_CACHE_CODE,
+        [os.path.join(CACHE_DIR, "babynamesIL", "meta.json")],
+    ),
+    "highlights": (
+        build_highlights,
+        [BABYNAMES_CSV, TOTALS_CSV, "streamlit/highlights.py"] + DATA_CACHE_CODE,
+        [],
+    ),
+    "analytics": (
+        build_analytics,
+        [BABYNAMES_CSV, "streamlit/analytics.py"] + DATA_CACHE_CODE,
+        [],
+    ),
+}
+
+
+def input_hashes(inputs):
+    """SHA-256 of every input that exists; missing inputs hash to None."""
+    return {path: file_hash(path) if os.path.exists(path) else None for path in inputs}
+
+
+def outputs_exist(outputs):
+    return all(os.path.exists(path) for path in outputs)
+
+
+def load_state(path=STATE_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def run_stage(name):
+    """Run one stage in a worker; returns (seconds, captured output, outputs)."""
+    os.chdir(REPO_DIR)
+    for path in (DATA_RAW_DIR, STREAMLIT_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    function, _, outputs = STAGES[name]
+    log = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        outputs = function() or outputs
+    return time.perf_counter() - start, log.getvalue(), outputs
+
+
+def build(stages=None, force=False, jobs=None, verbose=False):
+    """Run the stages whose inputs changed; returns the summary rows."""
+    os.chdir(REPO_DIR)
+    state = load_state()
+    summary = []
+    pending = {}
+    for name in stages or STAGES:
+        hashes = input_hashes(STAGES[name][1])
+        recorded = state.get(name, {})
+        if (
+            not force
+            and recorded.get("inputs") == hashes
+            and outputs_exist(recorded.get("outputs", []))
+        ):
+            summary.append((name, "up to date", 0.0))
+        else:
+            pending[name] = hashes
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(run_stage, name): name for name in pending}
+        for future in concurrent.futures.as_completed(futures):
+            name = futures[future]
+            try:
+                seconds, log, outputs = future.result()
+            except Exception as error:  # noqa: BLE001 - reported in the summary
+                summary.append((name, f"failed: {error!r}", 0.0))
+                continue
+            if verbose and log:
+                print(f"[{name}]\n{log}", end="")
+            missing = [path for path in outputs if not os.path.exists(path)]
+            if missing:
+                # Nothing recorded, so the stage runs again once it can
+                summary.append(
+                    (name, f"skipped: {', '.join(missing)} not written", 0.0)
+                )
+                continue
+            state[name] = {"inputs": pending[name], "outputs": outputs}
+            # Saved after every stage, so a failure does not redo finished ones
+            save_state(state)
+            summary.append((name, "rebuilt", seconds))
+
+    order = list(STAGES)
+    summary.sort(key=lambda row: order.index(row[0]))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "stages", nargs="*", help=f"stages to consider (default: all of {list(STAGES)})"
+    )
+    parser.add_argument("--force", action="store_true", help="ignore recorded hashes")
+    parser.add_argument("--jobs", type=int, help="worker processes")
+    parser.add_argument(
+        "--verbose", action="store_true", help="print the output of every stage"
+    )
+    args = parser.parse_args()
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    start = time.perf_counter()
+    summary = build(args.stages, args.force, args.jobs, args.verbose)
+    print(f"{'stage':<12} {'status':<14} {'seconds':>8}")
+    for name, status, seconds in summary:
+        print(f"{name:<12} {status:<14} {seconds:8.2f}")
+    rebuilt = sum(status == "rebuilt" for _, status, _ in summary)
+    print(
+        f"{rebuilt} of {len(summary)} stages rebuilt in "
+        f"{time.perf_counter() - start:.2f}s"
+    )
+    if any(status.startswith("failed") for _, status, _ in summary):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
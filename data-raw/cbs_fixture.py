@@ -0,0 +1,142 @@
+"""Small workbooks in the layout of the CBS release, and a check of process_cbs_data.py.
+
+write_workbook lays a long (sector, year, sex, name, n) table out the way CBS
+does: one sheet per sector and sex, three header rows (the last one holds
+the years), then a row per name with its total and one column per year.
+Counts under 5 are suppressed as "..", and large counts are written as text
+with thousands separators. Running the module writes a generated fixture,
+processes it and compares the result with the table it came from:
+
+    python data-raw/cbs_fixture.py                        # generated fixture
+    python data-raw/cbs_fixture.py --from-csv data-raw/babynamesIL.csv
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from process_cbs_data import (  # noqa: E402
+    MIN_N,
+    SECTORS,
+    SHEET_MAPPING,
+    assemble,
+    process,
+    validate,
+)
+
+KEYS = ["sector", "year", "sex", "name"]
+
+
+def generate(names_per_sheet=40, years=range(2015, 2021), seed=0):
+    """A long (sector, year, sex, name, n) table with CBS-like gaps."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for sector, sex in SHEET_MAPPING.values():
+        for i in range(names_per_sheet):
+            # A few popular names, many rare ones
+            scale = 3000 / (i + 1)
+            for year in years:
+                n = int(rng.poisson(scale))
+                # Names come and go; suppressed counts are dropped by CBS
+                if n >= MIN_N and rng.random() > 0.1:
+                    rows.append((sector, year, sex, f"{sector[0]}{sex}{i:03d}", n))
+    return pd.DataFrame(rows, columns=["sector", "year", "sex", "name", "n"])
+
+
+def cell(n):
+    if n < MIN_N:
+        return ".."
+    # CBS exports some counts as text with separators
+    return f"{n:,}" if n >= 1000 else n
+
+
+def write_workbook(babynames, path):
+    """Write a long table as a CBS-layout workbook with a sheet per sector/sex."""
+    years = np.arange(babynames["year"].min(), babynames["year"].max() + 1)
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for sheet_name, (sector, sex) in SHEET_MAPPING.items():
+            rows = babynames[
+                (babynames["sector"] == sector) & (babynames["sex"] == sex)
+            ]
+            wide = rows.pivot_table(
+                index="name", columns="year", values="n", aggfunc="sum", fill_value=0
+            ).reindex(columns=years, fill_value=0)
+            wide = wide.loc[wide.sum(axis=1).sort_values(ascending=False).index]
+            header = [
+                [f"Names given to babies: {sector}, {sex}"] + [None] * (len(years) + 1),
+                [None] * (len(years) + 2),
+                ["שם פרטי", "סך הכל"] + [int(year) for year in years],
+                ["prati1", None] + [None] * len(years),
+            ]
+            body = [
+                [name, cell(int(counts.sum()))] + [cell(int(n)) for n in counts]
+                for name, counts in zip(wide.index, wide.to_numpy())
+            ]
+            pd.DataFrame(header + body).to_excel(
+                writer, sheet_name=sheet_name, header=False, index=False
+            )
+
+
+def check(source, jobs=None):
+    """Round-trip ``source`` through a workbook and process_cbs_data.process."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cbs.xlsx")
+        start = time.perf_counter()
+        write_workbook(source, path)
+        print(f"Wrote fixture workbook in {time.perf_counter() - start:.2f}s")
+        babynames, babynames_totals = process(path, tmp, jobs=jobs)
+        written = pd.read_csv(os.path.join(tmp, "babynamesIL.csv"))
+
+    # Same rows and counts as the source, and what was returned was written
+    got = babynames.sort_values(KEYS).reset_index(drop=True)
+    want = source.sort_values(KEYS).reset_index(drop=True)
+    pd.testing.assert_frame_equal(
+        got[KEYS + ["n"]], want[KEYS + ["n"]], check_dtype=False
+    )
+    pd.testing.assert_frame_equal(written, babynames, check_dtype=False)
+    if "prop" in source:
+        # The port of zapsmall reproduces R's rounding
+        np.testing.assert_array_equal(got["prop"], want["prop"])
+
+    # Each (sector, year, sex) is ordered by decreasing n, sectors as in R
+    order = babynames.groupby(["sector", "year", "sex"], sort=False)["n"]
+    assert (order.diff().fillna(0) <= 0).all()
+    assert list(babynames["sector"].unique()) == [
+        s for s in SECTORS if s in set(source["sector"])
+    ]
+    assert babynames_totals["total"].sum() == source["n"].sum()
+
+    # Every broken invariant is reported
+    broken = babynames.copy()
+    broken.loc[0, "n"] = 3
+    broken = pd.concat([broken, broken.iloc[[1]]], ignore_index=True)
+    try:
+        validate(broken, assemble(broken)[1])
+    except ValueError as error:
+        assert "counts < 5" in str(error) and "Duplicate" in str(error), error
+    else:
+        raise AssertionError("broken table passed validation")
+    print("\nfixture round trip ok")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--from-csv", metavar="CSV", help="round-trip this babynamesIL.csv instead"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, help="worker processes")
+    args = parser.parse_args()
+    source = pd.read_csv(args.from_csv) if args.from_csv else generate(seed=args.seed)
+    check(source, args.jobs)
+
+
+if __name__ == "__main__":
+    main()
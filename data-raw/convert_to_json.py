@@ -1,65 +1,307 @@
-import pandas as pd
-import json
+"""Export the baby names data as JSON for the static site."""
+
+import argparse
 import gzip
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import zlib
+from contextlib import contextmanager
 
-def convert_data_for_static_site():
-    # Load data
-    babynames = pd.read_csv("babynamesIL.csv")
-    babynames_totals = pd.read_csv("babynamesIL_totals.csv")
-    
-    # Create names by sector lookup
-    names_by_sector = (
-        babynames[["sector", "name"]]
-        .drop_duplicates()
-        .groupby(["sector"])["name"]
-        .apply(list)
-        .to_dict()
+import numpy as np
+import pandas as pd
+
+# Number of rows turned into JSON per write; bounds the memory used for text
+CHUNK_ROWS = 50_000
+
+# Inputs and outputs, resolved against the repository root so the export
+# works from any working directory
+DATA_RAW_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(DATA_RAW_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "streamlit"))
+
+import data_paths  # noqa: E402
+
+DOCS_DIR = os.path.join(REPO_DIR, data_paths.DOCS_DIR)
+BABYNAMES_CSV = os.path.join(REPO_DIR, data_paths.DATASETS["babynames"])
+TOTALS_CSV = os.path.join(REPO_DIR, data_paths.DATASETS["totals"])
+
+
+@contextmanager
+def timed(stage, timings):
+    start = time.perf_counter()
+    yield
+    timings[stage] = time.perf_counter() - start
+    print(f"  {stage}: {timings[stage]:.2f}s")
+
+
+class TeeWriter:
+    """Write the same text to a plain file and a gzip file, encoding it once."""
+
+    def __init__(self, json_path, gzip_path):
+        self.plain = open(json_path, "wb")
+        self.compressed = gzip.open(gzip_path, "wb")
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        self.plain.write(data)
+        self.compressed.write(data)
+
+    def close(self):
+        self.plain.close()
+        self.compressed.close()
+
+
+def json_strings(values):
+    """JSON-encode each string, escaping every distinct value only once."""
+    codes, uniques = pd.factorize(values)
+    encoded = np.array([json.dumps(str(value)) for value in uniques], dtype=object)
+    return codes, encoded
+
+
+def group_by_first_appearance(keys):
+    """Order rows so each key is contiguous, keys sorted by first appearance.
+
+    Returns the row order, the encoded keys and the start offset of each key's
+    block (plus a final end offset).
+    """
+    codes, encoded = json_strings(keys)
+    order = np.argsort(codes, kind="stable")
+    starts = np.searchsorted(codes[order], np.arange(len(encoded) + 1))
+    return order, encoded, starts
+
+
+def write_babynames(out, babynames):
+    order, encoded, starts = group_by_first_appearance(
+        babynames["sector"] + "|" + babynames["name"]
     )
-    
-    # Convert to dictionary for efficient lookup
-    babynames_dict = {}
-    for _, row in babynames.iterrows():
-        key = f"{row['sector']}|{row['name']}"
-        if key not in babynames_dict:
-            babynames_dict[key] = []
-        babynames_dict[key].append({
-            'year': int(row['year']),
-            'sex': row['sex'],
-            'n': int(row['n']),
-            'prop': float(row['prop'])
-        })
-    
-    # Convert totals
-    totals_dict = {}
-    for _, row in babynames_totals.iterrows():
-        key = f"{row['sector']}|{row['name']}"
-        if key not in totals_dict:
-            totals_dict[key] = {'M': 0, 'F': 0}
-        totals_dict[key][row['sex']] = int(row['total'])
-    
-    # Create the final data structure
-    data = {
-        'names_by_sector': names_by_sector,
-        'babynames': babynames_dict,
-        'totals': totals_dict
+    rows = babynames.iloc[order]
+
+    out.write('"babynames":{')
+    group = 0
+    while group < len(encoded):
+        # Take whole groups until the chunk holds at least CHUNK_ROWS rows
+        last = np.searchsorted(starts, starts[group] + CHUNK_ROWS, side="left")
+        last = min(max(last, group + 1), len(encoded))
+        chunk = rows.iloc[starts[group] : starts[last]]
+
+        records = (
+            '{"year":'
+            + chunk["year"].astype(int).astype(str)
+            + ',"sex":"'
+            + chunk["sex"]
+            + '","n":'
+            + chunk["n"].astype(int).astype(str)
+            + ',"prop":'
+            + chunk["prop"].astype(float).map(repr)
+            + "}"
+        ).to_numpy()
+        bounds = starts[group : last + 1] - starts[group]
+
+        out.write(
+            ",".join(
+                encoded[g] + ":[" + ",".join(records[bounds[i] : bounds[i + 1]]) + "]"
+                for i, g in enumerate(range(group, last))
+            )
+        )
+        if last < len(encoded):
+            out.write(",")
+        group = last
+    out.write("}")
+
+
+def write_totals(out, babynames_totals):
+    codes, encoded = json_strings(
+        babynames_totals["sector"] + "|" + babynames_totals["name"]
+    )
+    totals = np.zeros((len(encoded), 2), dtype=np.int64)
+    sex = (babynames_totals["sex"] == "F").to_numpy().astype(int)
+    totals[codes, sex] = babynames_totals["total"].to_numpy()
+
+    out.write('"totals":{')
+    out.write(
+        ",".join(
+            f'{key}:{{"M":{m},"F":{f}}}'
+            for key, (m, f) in zip(encoded, totals.tolist())
+        )
+    )
+    out.write("}")
+
+
+def name_buckets(names, buckets=None):
+    """Shard bucket of each name: its first letter, or a crc32 hash bucket."""
+    if buckets is None:
+        return names.str[0]
+    unique = pd.unique(names)
+    bucket = {
+        name: f"{zlib.crc32(name.encode('utf-8')) % buckets:03d}" for name in unique
+    }
+    return names.map(bucket)
+
+
+def export_shards(
+    babynames_path=BABYNAMES_CSV,
+    totals_path=TOTALS_CSV,
+    out_dir=os.path.join(DOCS_DIR, "data"),
+    buckets=None,
+):
+    """Write one content-hashed JSON shard per (sector, name bucket) plus a manifest.
+
+    Each shard has the same {"babynames", "totals"} layout as data.json,
+    restricted to its names. manifest.json maps "sector|bucket" to the shard
+    file and its size, and carries names_by_sector, so a page only needs the
+    manifest and the shard of the name it shows. Buckets are the first letter
+    of the name, or ``crc32(utf-8 name) % buckets`` when ``buckets`` is given.
+    """
+    timings = {}
+    with timed("load CSVs", timings):
+        babynames = pd.read_csv(babynames_path)
+        babynames_totals = pd.read_csv(totals_path)
+
+    with timed("names by sector", timings):
+        names_by_sector = (
+            babynames[["sector", "name"]]
+            .drop_duplicates()
+            .groupby(["sector"])["name"]
+            .apply(list)
+            .to_dict()
+        )
+
+    shard_dir = os.path.join(out_dir, "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+    shards = {}
+    with timed("write shards", timings):
+        babynames["bucket"] = name_buckets(babynames["name"], buckets)
+        babynames_totals["bucket"] = name_buckets(babynames_totals["name"], buckets)
+        totals_by_shard = {
+            key: rows
+            for key, rows in babynames_totals.groupby(["sector", "bucket"], sort=False)
+        }
+        for (sector, bucket), rows in babynames.groupby(
+            ["sector", "bucket"], sort=True
+        ):
+            buf = io.StringIO()
+            buf.write("{")
+            write_babynames(buf, rows)
+            buf.write(",")
+            write_totals(
+                buf, totals_by_shard.get((sector, bucket), babynames_totals.iloc[0:0])
+            )
+            buf.write("}")
+            data = buf.getvalue().encode("utf-8")
+
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            bucket_id = "-".join(f"{ord(ch):04x}" for ch in bucket)
+            file_name = f"{sector}-{bucket_id}.{digest}.json"
+            with open(os.path.join(shard_dir, file_name), "wb") as f:
+                f.write(data)
+            shards[f"{sector}|{bucket}"] = {
+                "file": f"shards/{file_name}",
+                "bytes": len(data),
+                "gzip_bytes": len(gzip.compress(data)),
+            }
+
+    # Shard names change with their content; drop the ones no longer referenced
+    current = {os.path.basename(shard["file"]) for shard in shards.values()}
+    for file_name in os.listdir(shard_dir):
+        if file_name not in current:
+            os.remove(os.path.join(shard_dir, file_name))
+
+    manifest = {
+        "bucketing": (
+            {"type": "first_letter"}
+            if buckets is None
+            else {"type": "crc32", "count": buckets}
+        ),
+        "names_by_sector": names_by_sector,
+        "shards": shards,
     }
-    
-    # Save as compressed JSON
-    with gzip.open('../docs/data.json.gz', 'wt', encoding='utf-8') as f:
-        json.dump(data, f, separators=(',', ':'))
-    
-    # Also save uncompressed version
-    with open('../docs/data.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, separators=(',', ':'))
-    
-    print(f"Data converted successfully!")
-    print(f"Original CSV size: ~{(babynames.memory_usage(deep=True).sum() / 1024 / 1024):.1f} MB")
-    
-    import os
-    json_size = os.path.getsize('../docs/data.json') / 1024 / 1024
-    gzip_size = os.path.getsize('../docs/data.json.gz') / 1024 / 1024
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+
+    sizes = [shard["gzip_bytes"] for shard in shards.values()]
+    print(f"Wrote {len(shards)} shards to {shard_dir}")
+    print(f"Manifest size: {os.path.getsize(manifest_path) / 1024:.1f} KB")
+    print(
+        f"Gzipped shard size: median {np.median(sizes) / 1024:.1f} KB, "
+        f"max {max(sizes) / 1024:.1f} KB"
+    )
+    return timings
+
+
+def convert_data_for_static_site(
+    babynames_path=BABYNAMES_CSV,
+    totals_path=TOTALS_CSV,
+    json_path=os.path.join(DOCS_DIR, "data.json"),
+    gzip_path=os.path.join(DOCS_DIR, "data.json.gz"),
+):
+    timings = {}
+    total_start = time.perf_counter()
+
+    with timed("load CSVs", timings):
+        babynames = pd.read_csv(babynames_path)
+        babynames_totals = pd.read_csv(totals_path)
+
+    # Create names by sector lookup
+    with timed("names by sector", timings):
+        names_by_sector = (
+            babynames[["sector", "name"]]
+            .drop_duplicates()
+            .groupby(["sector"])["name"]
+            .apply(list)
+            .to_dict()
+        )
+
+    # Stream {"names_by_sector", "babynames", "totals"} into both outputs
+    os.makedirs(os.path.dirname(json_path) or ".", exist_ok=True)
+    os.makedirs(os.path.dirname(gzip_path) or ".", exist_ok=True)
+    out = TeeWriter(json_path, gzip_path)
+    try:
+        out.write('{"names_by_sector":')
+        out.write(json.dumps(names_by_sector, separators=(",", ":")))
+        out.write(",")
+        with timed("write babynames", timings):
+            write_babynames(out, babynames)
+        out.write(",")
+        with timed("write totals", timings):
+            write_totals(out, babynames_totals)
+        out.write("}")
+    finally:
+        with timed("flush", timings):
+            out.close()
+
+    print(f"Data converted successfully in {time.perf_counter() - total_start:.2f}s")
+    print(
+        f"Original CSV size: ~{(babynames.memory_usage(deep=True).sum() / 1024 / 1024):.1f} MB"
+    )
+
+    json_size = os.path.getsize(json_path) / 1024 / 1024
+    gzip_size = os.path.getsize(gzip_path) / 1024 / 1024
     print(f"JSON size: {json_size:.1f} MB")
     print(f"Gzipped JSON size: {gzip_size:.1f} MB")
+    return timings
+
 
 if __name__ == "__main__":
-    convert_data_for_static_site() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--shards",
+        metavar="DIR",
+        help="write per-(sector, name bucket) shards and manifest.json to DIR "
+        "instead of a single data.json",
+    )
+    parser.add_argument(
+        "--buckets",
+        type=int,
+        help="with --shards, hash names into this many buckets per sector "
+        "instead of bucketing by first letter",
+    )
+    args = parser.parse_args()
+    if args.shards:
+        export_shards(out_dir=args.shards, buckets=args.buckets)
+    else:
+        convert_data_for_static_site()
@@ -0,0 +1,284 @@
+"""Process the CBS baby names Excel release into the data-raw tables.
+
+A Python port of process_cbs_data.R that needs no R. The eight sector/sex
+sheets are parsed in parallel on a process pool. Each sheet's year columns are
+melted with numpy reshapes instead of a per-cell pivot. The invariants of the
+R script (proportion sums, duplicates, the n >= 5 threshold, sectors, year
+gaps) come from a single groupby over (sector, year, sex). Only the totals
+consistency needs a second one, over the totals keys.
+
+babynamesIL.csv and babynamesIL_totals.csv are written with the same
+schema and row order as the R script. The binary caches and JSON exports
+are then rebuilt by build.py, which skips the stages whose inputs did not
+change. The package's .rda files still come from
+``usethis::use_data`` in R. Reading the workbook needs openpyxl. Run from
+anywhere:
+
+    python data-raw/process_cbs_data.py data-raw/11_25_391t1.xlsx
+    python data-raw/process_cbs_data.py book.xlsx --out-dir /tmp/out --no-build
+"""
+
+import argparse
+import concurrent.futures
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+DATA_RAW_DIR = os.path.dirname(os.path.abspath(__file__))
+CBS_FILE = os.path.join(DATA_RAW_DIR, "11_25_391t1.xlsx")
+# Header rows above the names; the last one holds the years
+SKIP_ROWS = 3
+DEFAULT_START_YEAR = 1949
+MIN_N = 5
+
+SECTORS = ["Jewish", "Muslim", "Christian-Arab", "Druze"]
+
+# Sheet name -> (sector, sex)
+SHEET_MAPPING = {
+    "בנות יהודיות": ("Jewish", "F"),
+    "בנים יהודים": ("Jewish", "M"),
+    "בנות מוסלמיות": ("Muslim", "F"),
+    "בנים מוסלמים": ("Muslim", "M"),
+    "בנות נוצריות-ערביות": ("Christian-Arab", "F"),
+    "בנים נוצרים-ערבים": ("Christian-Arab", "M"),
+    "בנות דרוזיות": ("Druze", "F"),
+    "בנים דרוזים": ("Druze", "M"),
+}
+
+COLUMNS = ["sector", "year", "sex", "name", "n", "prop"]
+
+
+def clean_numeric(values):
+    """Cells as floats: thousands separators removed, ".." and "." as NaN."""
+    text = pd.Series(values, dtype=object).astype(str).str.replace(",", "")
+    return pd.to_numeric(text, errors="coerce").to_numpy(dtype=float)
+
+
+def codes(values):
+    """Integer codes of values in sorted order, for np.lexsort."""
+    return pd.factorize(np.asarray(values), sort=True)[0]
+
+
+def detect_start_year(header):
+    """Smallest year in the last header row, or DEFAULT_START_YEAR."""
+    values = pd.to_numeric(pd.Series(header, dtype=object), errors="coerce")
+    years = values[(values > 1900) & (values < 2100)]
+    return int(years.min()) if len(years) else DEFAULT_START_YEAR
+
+
+def parse_sheet(path, sheet_name, sector, sex, start_year=None):
+    """One sheet as a long (sector, year, sex, name, n, prop) frame.
+
+    Columns are name, total and one column per year from ``start_year``
+    (detected from the header when None). Suppressed cells and zero counts
+    are dropped. ``prop`` is the share of the name among the sheet's babies
+    of that year.
+    """
+    raw = pd.read_excel(path, sheet_name=sheet_name, header=None, dtype=object)
+    if start_year is None:
+        start_year = detect_start_year(raw.iloc[SKIP_ROWS - 1])
+    body = raw.iloc[SKIP_ROWS:]
+    names = body.iloc[:, 0]
+    keep = names.notna() & ~names.astype(str).str.match("(?i)^prati")
+    names = names[keep].astype(str).to_numpy()
+    counts = body.iloc[:, 2:][keep.to_numpy()].to_numpy()
+    years = np.arange(start_year, start_year + counts.shape[1])
+
+    # Melt row-major: every name with all its years, like pivot_longer
+    n = clean_numeric(counts.ravel())
+    rows = np.flatnonzero(n > 0)
+    frame = pd.DataFrame(
+        {
+            "sector": sector,
+            "year": np.tile(years, len(names))[rows],
+            "sex": sex,
+            "name": np.repeat(names, len(years))[rows],
+            "n": n[rows],
+        }
+    )
+
+    totals = frame.groupby("year")["n"].transform("sum").to_numpy()
+    prop = frame["n"].to_numpy() / totals
+    # R's zapsmall per year: round to 7 - log10(largest proportion of the
+    # year) decimals, a count R's round() rounds to the nearest integer
+    largest = pd.Series(prop).groupby(frame["year"].to_numpy()).transform("max")
+    digits = np.floor(7 - np.log10(largest.to_numpy()) + 0.5)
+    digits = np.maximum(0, digits).astype(int)
+    for d in np.unique(digits):
+        prop[digits == d] = np.round(prop[digits == d], d)
+    frame["prop"] = prop
+    return frame
+
+
+def parse_workbook(path=CBS_FILE, start_year=None, jobs=None):
+    """All sheets of SHEET_MAPPING, parsed in parallel and concatenated in order."""
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(parse_sheet, path, sheet_name, sector, sex, start_year)
+            for sheet_name, (sector, sex) in SHEET_MAPPING.items()
+        ]
+        frames = [future.result() for future in futures]
+    return pd.concat(frames, ignore_index=True)
+
+
+def assemble(frame):
+    """babynamesIL and babynamesIL_totals in the order of process_cbs_data.R.
+
+    Rows are sorted by sector (in SECTORS order), year, sex and decreasing
+    ``n``; totals by sector, sex and decreasing total, ties by name. Both
+    sorts are stable, as dplyr's arrange is.
+    """
+    sector_codes = pd.Categorical(frame["sector"], categories=SECTORS).codes
+    order = np.lexsort(
+        (-frame["n"].to_numpy(), codes(frame["sex"]), frame["year"], sector_codes)
+    )
+    babynames = frame.iloc[order][COLUMNS].reset_index(drop=True)
+    babynames["year"] = babynames["year"].astype(int)
+    babynames["n"] = babynames["n"].astype(int)
+
+    totals = babynames.groupby(["sector", "sex", "name"], sort=True)["n"].sum()
+    totals = totals.rename("total").reset_index()
+    order = np.lexsort(
+        (-totals["total"].to_numpy(), codes(totals["sex"]), codes(totals["sector"]))
+    )
+    babynames_totals = totals.iloc[order].reset_index(drop=True)
+    return babynames, babynames_totals
+
+
+def validate(babynames, babynames_totals):
+    """Check the invariants of the R script; returns the report lines.
+
+    Raises ValueError naming every failed check. Year gaps only warn.
+    """
+    groups = babynames.groupby(["sector", "year", "sex"], sort=True).agg(
+        prop_sum=("prop", "sum"),
+        rows=("name", "size"),
+        names=("name", "nunique"),
+        min_n=("n", "min"),
+    )
+    failed, report = [], []
+
+    def check(ok, message, error):
+        if ok:
+            report.append(f"  [OK] {message}")
+        else:
+            failed.append(error)
+
+    check(
+        bool((groups["prop_sum"] - 1.0).abs().lt(0.01).all()),
+        "Proportions sum to ~1 for all sector/year/sex groups",
+        "Proportions do not sum to ~1 for all groups",
+    )
+    check(
+        bool((groups["rows"] == groups["names"]).all()),
+        "No duplicate name/year/sector/sex combinations",
+        "Duplicate name/year/sector/sex found",
+    )
+    check(
+        bool((groups["min_n"] >= MIN_N).all()),
+        f"All counts >= {MIN_N}",
+        f"Found counts < {MIN_N}",
+    )
+    sectors = groups.index.get_level_values("sector")
+    check(
+        set(sectors) == set(SECTORS),
+        f"Sectors match expected: {', '.join(SECTORS)}",
+        "Unexpected sectors",
+    )
+
+    # Years of every sector, from the group keys rather than the rows
+    years = pd.Series(groups.index.get_level_values("year"), index=sectors)
+    years = years.groupby(level=0).unique()
+    gaps = {}
+    for sector, values in years.items():
+        values = np.sort(values)
+        after = values[1:][np.diff(values) > 1]
+        if after.size:
+            gaps[sector] = after.tolist()
+    if gaps:
+        warnings.warn(f"Year gaps detected (first year after each gap): {gaps}")
+    else:
+        report.append("  [OK] No year gaps detected")
+
+    computed = babynames.groupby(["sector", "sex", "name"])["n"].sum()
+    given = babynames_totals.set_index(["sector", "sex", "name"])["total"]
+    common = computed.index.intersection(given.index)
+    check(
+        bool((computed[common] == given[common]).all()),
+        "Totals dataset matches computed sums from yearly data",
+        "Totals dataset inconsistent with yearly data",
+    )
+
+    if failed:
+        raise ValueError("Validation failed:\n  " + "\n  ".join(failed))
+    return report
+
+
+def write_tables(babynames, babynames_totals, out_dir=DATA_RAW_DIR):
+    """Write babynamesIL.csv and babynamesIL_totals.csv; returns their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for df, table in [
+        (babynames, "babynamesIL"),
+        (babynames_totals, "babynamesIL_totals"),
+    ]:
+        path = os.path.join(out_dir, f"{table}.csv")
+        df.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def process(path=CBS_FILE, out_dir=DATA_RAW_DIR, start_year=None, jobs=None):
+    """Parse, validate and write the tables of a CBS workbook; returns them."""
+    start = time.perf_counter()
+    frame = parse_workbook(path, start_year, jobs)
+    print(f"Parsed {len(SHEET_MAPPING)} sheets in {time.perf_counter() - start:.2f}s")
+    babynames, babynames_totals = assemble(frame)
+
+    print("\n=== Dataset Summary ===")
+    print(f"babynamesIL: {len(babynames)} rows")
+    print(f"  Sectors: {', '.join(babynames['sector'].unique())}")
+    print(f"  Year range: {babynames['year'].min()} - {babynames['year'].max()}")
+    print(f"  Unique names: {babynames['name'].nunique()}")
+    print(f"babynamesIL_totals: {len(babynames_totals)} rows")
+
+    print("\n=== Data Validation ===")
+    print("\n".join(validate(babynames, babynames_totals)))
+
+    for written in write_tables(babynames, babynames_totals, out_dir):
+        print(f"Wrote {written}")
+    return babynames, babynames_totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cbs_file", nargs="?", default=CBS_FILE)
+    parser.add_argument(
+        "--start-year", type=int, help="first year column (default: from the header)"
+    )
+    parser.add_argument("--out-dir", default=DATA_RAW_DIR)
+    parser.add_argument("--jobs", type=int, help="worker processes")
+    parser.add_argument(
+        "--no-build",
+        action="store_true",
+        help="only write the CSVs; do not rebuild the caches and JSON exports",
+    )
+    args = parser.parse_args()
+
+    process(args.cbs_file, args.out_dir, args.start_year, args.jobs)
+    # The exports are built from the tables in data-raw only
+    into_data_raw = os.path.abspath(args.out_dir) == DATA_RAW_DIR
+    if into_data_raw and not args.no_build:
+        # Imported here so --no-build works outside a full checkout
+        from build import build
+
+        print("\n=== Exports ===")
+        for name, status, seconds in build(jobs=args.jobs):
+            print(f"  {name:<12} {status:<14} {seconds:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""Compact binary encoding of the baby names time series.
+
+The format stores the same information as babynamesIL.csv without repeating
+keys per record:
+
+* string tables for sectors, sexes and names (names sorted, utf-8);
+* one entry per (sector, sex, name) series holding its sector/sex ids, the
+  delta of its name id from the previous series of the same (sector, sex),
+  and its number of years;
+* the years of every series, delta-encoded (the first year relative to the
+  file's base year, then the gap from the previous year);
+* the counts ``n``;
+* the denominators, i.e. the total births of every (sector, sex, year) group.
+  ``prop`` is not stored; it is recomputed as ``n / denominator``.
+
+All integers are unsigned LEB128 varints, and each section is a varint
+length followed by its bytes, after a ``b"BNIL"`` magic and a version byte.
+Varints are encoded and decoded with NumPy, one pass per byte position.
+
+Usage (from data-raw/):
+
+    python series_codec.py babynamesIL.csv babynamesIL.bin --check
+"""
+
+import argparse
+import gzip
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from convert_to_json import DOCS_DIR
+
+MAGIC = b"BNIL"
+VERSION = 1
+
+
+def encode_varints(values):
+    values = np.asarray(values, dtype=np.uint64)
+    if values.size == 0:
+        return b""
+    nbytes = np.ones(values.size, dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        nbytes += rest > 0
+        rest >>= np.uint64(7)
+
+    ends = np.cumsum(nbytes)
+    starts = ends - nbytes
+    out = np.empty(ends[-1], dtype=np.uint8)
+    rest = values.copy()
+    for k in range(nbytes.max()):
+        active = nbytes > k
+        low = (rest[active] & np.uint64(0x7F)).astype(np.uint8)
+        more = (nbytes[active] > k + 1).astype(np.uint8) << 7
+        out[starts[active] + k] = low | more
+        rest >>= np.uint64(7)
+    return out.tobytes()
+
+
+def decode_varints(data):
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size == 0:
+        return np.zeros(0, dtype=np.uint64)
+    ends = np.flatnonzero(raw < 0x80)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    lengths = ends - starts + 1
+    values = np.zeros(ends.size, dtype=np.uint64)
+    for k in range(lengths.max()):
+        active = lengths > k
+        low = (raw[starts[active] + k] & 0x7F).astype(np.uint64)
+        values[active] |= low << np.uint64(7 * k)
+    return values
+
+
+def encode_strings(strings):
+    encoded = [s.encode("utf-8") for s in strings]
+    lengths = encode_varints([len(strings)] + [len(s) for s in encoded])
+    return lengths + b"".join(encoded)
+
+
+def decode_strings(data):
+    # The lengths are a varint prefix; read them one value at a time
+    count, pos = _read_varint(data, 0)
+    lengths = []
+    for _ in range(count):
+        length, pos = _read_varint(data, pos)
+        lengths.append(length)
+    strings = []
+    for length in lengths:
+        strings.append(data[pos : pos + length].decode("utf-8"))
+        pos += length
+    return strings
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return value, pos
+
+
+def _section(data):
+    return encode_varints([len(data)]) + data
+
+
+def encode(babynames):
+    """Encode a (sector, year, sex, name, n, prop) frame to bytes."""
+    df = babynames[["sector", "year", "sex", "name", "n"]].copy()
+    sector_id, sectors = pd.factorize(df["sector"], sort=True)
+    sex_id, sexes = pd.factorize(df["sex"], sort=True)
+    name_id, names = pd.factorize(df["name"], sort=True)
+    df["sector_id"], df["sex_id"], df["name_id"] = sector_id, sex_id, name_id
+    df = df.sort_values(["sector_id", "sex_id", "name_id", "year"])
+    base_year = int(df["year"].min()) if len(df) else 0
+
+    series = (
+        df.groupby(["sector_id", "sex_id", "name_id"], sort=True)
+        .size()
+        .reset_index(name="length")
+    )
+    name_delta = series.groupby(["sector_id", "sex_id"])["name_id"].diff()
+    series["name_delta"] = name_delta.fillna(series["name_id"]).astype(np.int64)
+
+    years = df["year"].to_numpy(dtype=np.int64)
+    year_delta = np.diff(years, prepend=base_year)
+    lengths = series["length"].to_numpy()
+    starts = np.cumsum(lengths) - lengths
+    year_delta[starts] = years[starts] - base_year
+
+    denominators = (
+        df.groupby(["sector_id", "sex_id", "year"], sort=True)["n"].sum().reset_index()
+    )
+
+    return (
+        MAGIC
+        + bytes([VERSION])
+        + encode_varints([base_year])
+        + _section(encode_strings(list(sectors)))
+        + _section(encode_strings(list(sexes)))
+        + _section(encode_strings(list(names)))
+        + _section(
+            encode_varints(
+                series[["sector_id", "sex_id", "name_delta", "length"]]
+                .to_numpy()
+                .ravel()
+            )
+        )
+        + _section(encode_varints(year_delta))
+        + _section(encode_varints(df["n"].to_numpy()))
+        + _section(
+            encode_varints(
+                np.column_stack(
+                    [
+                        denominators["sector_id"],
+                        denominators["sex_id"],
+                        denominators["year"] - base_year,
+                        denominators["n"],
+                    ]
+                ).ravel()
+            )
+        )
+    )
+
+
+def decode(data):
+    """Decode bytes written by :func:`encode` into a (sector, year, sex, name, n, prop) frame.
+
+    Rows are ordered by sector, sex, name and year.
+    """
+    if data[:4] != MAGIC or data[4] != VERSION:
+        raise ValueError("Not a babynamesIL series file (bad magic or version)")
+    base_year, pos = _read_varint(data, 5)
+    sections = []
+    while pos < len(data):
+        length, pos = _read_varint(data, pos)
+        sections.append(data[pos : pos + length])
+        pos += length
+    sectors, sexes, names = (
+        np.array(decode_strings(s), dtype=object) for s in sections[:3]
+    )
+
+    series = decode_varints(sections[3]).astype(np.int64).reshape(-1, 4)
+    sector_id, sex_id, name_delta, length = series.T
+    run = np.concatenate([[True], (np.diff(sector_id) != 0) | (np.diff(sex_id) != 0)])
+    name_id = _cumsum_by_run(name_delta, run)
+
+    year_delta = decode_varints(sections[4]).astype(np.int64)
+    starts = np.cumsum(length) - length
+    first = np.zeros(year_delta.size, dtype=bool)
+    first[starts] = True
+    year_delta[starts] += base_year
+    years = _cumsum_by_run(year_delta, first)
+    n = decode_varints(sections[5]).astype(np.int64)
+
+    row_sector = np.repeat(sector_id, length)
+    row_sex = np.repeat(sex_id, length)
+    denominators = decode_varints(sections[6]).astype(np.int64).reshape(-1, 4)
+    span = years.max() - base_year + 1 if years.size else 1
+    lookup = np.zeros((len(sectors), len(sexes), span), dtype=np.int64)
+    lookup[denominators[:, 0], denominators[:, 1], denominators[:, 2]] = denominators[
+        :, 3
+    ]
+
+    return pd.DataFrame(
+        {
+            "sector": sectors[row_sector],
+            "year": years,
+            "sex": sexes[row_sex],
+            "name": names[np.repeat(name_id, length)],
+            "n": n,
+            "prop": n / lookup[row_sector, row_sex, years - base_year],
+        }
+    )
+
+
+def _cumsum_by_run(values, run_start):
+    """Cumulative sum of ``values`` restarting wherever ``run_start`` is True."""
+    total = np.cumsum(values)
+    # Values are non-negative, so the sum before each run start only grows
+    offsets = np.where(run_start, total - values, 0)
+    return total - np.maximum.accumulate(offsets)
+
+
+def check_round_trip(babynames, decoded):
+    """Assert that ``decoded`` holds exactly the rows of ``babynames``."""
+    keys = ["sector", "sex", "name", "year"]
+    expected = babynames.sort_values(keys).reset_index(drop=True)
+    actual = decoded.sort_values(keys).reset_index(drop=True)
+    assert len(expected) == len(actual), "Row count differs"
+    for col in keys + ["n"]:
+        assert (expected[col].to_numpy() == actual[col].to_numpy()).all(), col
+    assert np.allclose(expected["prop"], actual["prop"], rtol=0, atol=1e-7), "prop"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv", help="input CSV, e.g. babynamesIL.csv")
+    parser.add_argument("output", help="path of the binary file to write")
+    parser.add_argument(
+        "--check", action="store_true", help="decode the output and compare to the CSV"
+    )
+    parser.add_argument(
+        "--json",
+        default=os.path.join(DOCS_DIR, "data.json.gz"),
+        help="data.json.gz to compare with",
+    )
+    args = parser.parse_args()
+
+    babynames = pd.read_csv(args.csv)
+    start = time.perf_counter()
+    data = encode(babynames)
+    encode_seconds = time.perf_counter() - start
+    with open(args.output, "wb") as f:
+        f.write(data)
+
+    start = time.perf_counter()
+    decoded = decode(data)
+    decode_seconds = time.perf_counter() - start
+
+    print(f"Encoded {len(babynames)} rows in {encode_seconds:.2f}s")
+    print(f"Binary size: {len(data) / 1024:.1f} KB")
+    print(f"Gzipped binary size: {len(gzip.compress(data)) / 1024:.1f} KB")
+    print(f"Decode time: {decode_seconds * 1e3:.1f} ms")
+
+    if os.path.exists(args.json):
+        start = time.perf_counter()
+        with gzip.open(args.json, "rt", encoding="utf-8") as f:
+            json.load(f)
+        json_seconds = time.perf_counter() - start
+        print(f"{args.json}: {os.path.getsize(args.json) / 1024:.1f} KB")
+        print(f"{args.json} decode time: {json_seconds * 1e3:.1f} ms")
+
+    if args.check:
+        check_round_trip(babynames, decoded)
+        print("Round trip OK")
+
+
+if __name__ == "__main__":
+    main()
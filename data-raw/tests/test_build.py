@@ -0,0 +1,99 @@
+"""Tests of build.py on a small copy of the tree. Run from the repository root:
+
+    python -m pytest data-raw/tests
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pandas as pd
+
+DATA_RAW_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+STREAMLIT_DIR = os.path.join(DATA_RAW_DIR, "..", "streamlit")
+
+
+def make_tree(root):
+    """build.py, the cache code and two small tables, laid out as in the repo."""
+    os.makedirs(root / "data-raw")
+    os.makedirs(root / "streamlit")
+    shutil.copy(os.path.join(DATA_RAW_DIR, "build.py"), root / "data-raw")
+    for module in ["data_cache.py", "data_paths.py"]:
+        shutil.copy(os.path.join(STREAMLIT_DIR, module), root / "streamlit")
+    babynames = pd.DataFrame(
+        {
+            "sector": ["Jewish", "Jewish", "Muslim"],
+            "year": [2020, 2020, 2020],
+            "sex": ["F", "M", "M"],
+            "name": ["נועה", "נועם", "מוחמד"],
+            "n": [10, 12, 7],
+            "prop": [1.0, 1.0, 1.0],
+        }
+    )
+    babynames.to_csv(root / "data-raw" / "babynamesIL.csv", index=False)
+    totals = babynames.rename(columns={"n": "total"}).drop(columns=["year", "prop"])
+    totals.to_csv(root / "data-raw" / "babynamesIL_totals.csv", index=False)
+
+
+def run_build(root, *stages):
+    result = subprocess.run(
+        [sys.executable, str(root / "data-raw" / "build.py"), *stages],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Rows of the summary table: stage, status, seconds
+    statuses = {}
+    for line in result.stdout.splitlines()[1:-1]:
+        name, rest = line.split(None, 1)
+        statuses[name] = rest.rsplit(None, 1)[0]
+    return statuses
+
+
+def is_fresh(root, table):
+    """data_cache.is_fresh of the tree's copy, as the app would call it."""
+    code = (
+        "from data_cache import cache_path, is_fresh;"
+        f" print(is_fresh('data-raw/{table}.csv', cache_path('data-raw/{table}.csv')))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=root,
+        env={**os.environ, "PYTHONPATH": str(root / "streamlit")},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.strip() == "True"
+
+
+def test_touched_csv_is_up_to_date_for_build_and_app(tmp_path):
+    make_tree(tmp_path)
+    assert run_build(tmp_path, "cache") == {"cache": "rebuilt"}
+    assert is_fresh(tmp_path, "babynamesIL")
+
+    # Rewritten with the same content and a newer mtime, as by a checkout
+    csv = tmp_path / "data-raw" / "babynamesIL.csv"
+    stat = os.stat(csv)
+    csv.write_bytes(csv.read_bytes())
+    os.utime(csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert run_build(tmp_path, "cache") == {"cache": "up to date"}
+    assert is_fresh(tmp_path, "babynamesIL")
+
+    # A change of content is stale for both
+    with open(csv, "a", encoding="utf-8") as f:
+        f.write("Druze,2020,F,נור,5,1.0\n")
+    assert not is_fresh(tmp_path, "babynamesIL")
+    assert run_build(tmp_path, "cache") == {"cache": "rebuilt"}
+    assert is_fresh(tmp_path, "babynamesIL")
+
+
+def test_stage_without_its_outputs_is_skipped(tmp_path):
+    make_tree(tmp_path)
+    os.remove(tmp_path / "data-raw" / "babynamesIL.csv")
+
+    status = run_build(tmp_path, "cache")["cache"]
+    assert status.startswith("skipped") and "babynamesIL/meta.json" in status
+    # Nothing was recorded, so the stage is not up to date
+    assert run_build(tmp_path, "cache")["cache"].startswith("skipped")
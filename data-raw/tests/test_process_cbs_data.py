@@ -0,0 +1,91 @@
+"""Tests of process_cbs_data.py on workbooks written by cbs_fixture.py.
+
+Run from the repository root:
+
+    python -m pytest data-raw/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+DATA_RAW_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, DATA_RAW_DIR)
+
+from cbs_fixture import KEYS, generate, write_workbook  # noqa: E402
+from process_cbs_data import (  # noqa: E402
+    SECTORS,
+    SHEET_MAPPING,
+    assemble,
+    parse_sheet,
+    process,
+    validate,
+)
+
+
+@pytest.fixture(scope="module")
+def source():
+    return generate(names_per_sheet=10, years=range(2018, 2021))
+
+
+def test_round_trip(source, tmp_path):
+    path = tmp_path / "cbs.xlsx"
+    write_workbook(source, path)
+    babynames, babynames_totals = process(path, tmp_path, jobs=1)
+
+    got = babynames.sort_values(KEYS).reset_index(drop=True)
+    want = source.sort_values(KEYS).reset_index(drop=True)
+    pd.testing.assert_frame_equal(
+        got[KEYS + ["n"]], want[KEYS + ["n"]], check_dtype=False
+    )
+    written = pd.read_csv(tmp_path / "babynamesIL.csv")
+    pd.testing.assert_frame_equal(written, babynames, check_dtype=False)
+
+    # Each (sector, year, sex) is ordered by decreasing n, sectors as in R
+    order = babynames.groupby(["sector", "year", "sex"], sort=False)["n"]
+    assert (order.diff().fillna(0) <= 0).all()
+    assert list(babynames["sector"].unique()) == SECTORS
+    assert babynames_totals["total"].sum() == source["n"].sum()
+
+
+def test_validation_reports_every_failure(source):
+    babynames = source.copy()
+    totals = babynames.groupby(["sector", "year", "sex"])["n"].transform("sum")
+    babynames["prop"] = babynames["n"] / totals
+    babynames.loc[0, "n"] = 3
+    broken = pd.concat([babynames, babynames.iloc[[1]]], ignore_index=True)
+
+    with pytest.raises(ValueError) as error:
+        validate(broken, assemble(broken)[1])
+    assert "counts < 5" in str(error.value)
+    assert "Duplicate" in str(error.value)
+
+
+def test_prop_rounded_like_zapsmall(tmp_path):
+    # Decimals per year: floor(7 - log10(largest prop) + 0.5), so 9 for 2020
+    # (largest 30/1003 ~ 0.03) and 7 for 2021 (largest 7/17 ~ 0.41)
+    n_2020 = [30] + [7] * 139
+    n_2021 = [7, 5, 5]
+    babynames = pd.DataFrame(
+        {
+            "sector": "Jewish",
+            "year": [2020] * len(n_2020) + [2021] * len(n_2021),
+            "sex": "M",
+            "name": [f"n{i:03d}" for i in range(len(n_2020))]
+            + ["n000", "n001", "n002"],
+            "n": n_2020 + n_2021,
+        }
+    )
+    path = tmp_path / "cbs.xlsx"
+    write_workbook(babynames, path)
+    sheet_name = next(k for k, v in SHEET_MAPPING.items() if v == ("Jewish", "M"))
+    frame = parse_sheet(path, sheet_name, "Jewish", "M")
+
+    prop = frame.set_index(["year", "name"])["prop"]
+    np.testing.assert_array_equal(
+        prop.loc[[(2020, "n000"), (2020, "n001"), (2021, "n000"), (2021, "n001")]],
+        [0.029910269, 0.006979063, 0.4117647, 0.2941176],
+    )
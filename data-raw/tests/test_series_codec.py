@@ -0,0 +1,78 @@
+"""Round trips of series_codec.py. Run from the repository root:
+
+    python -m pytest data-raw/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+DATA_RAW_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, DATA_RAW_DIR)
+
+from series_codec import (  # noqa: E402
+    _read_varint,
+    check_round_trip,
+    decode,
+    decode_varints,
+    encode,
+    encode_varints,
+)
+
+COLUMNS = ["sector", "year", "sex", "name", "n", "prop"]
+
+
+@pytest.mark.parametrize(
+    "csv", ["babynamesIL.csv", "babynamesIL_1948.csv", "babynamesIL_other.csv"]
+)
+def test_csv_round_trip(csv):
+    path = os.path.join(DATA_RAW_DIR, csv)
+    if not os.path.exists(path):
+        pytest.skip(f"{csv} not in this checkout")
+    babynames = pd.read_csv(path)
+    check_round_trip(babynames, decode(encode(babynames)))
+
+
+def test_varint_edges():
+    values = [0, 127, 128, 2**35]
+    data = encode_varints(values)
+    # One byte up to 127, a continuation byte from 128, 5 bits per 7 after
+    assert data[:4] == b"\x00\x7f\x80\x01"
+    assert len(data) == 1 + 1 + 2 + 6
+    assert decode_varints(data).tolist() == values
+
+    pos, decoded = 0, []
+    while pos < len(data):
+        value, pos = _read_varint(data, pos)
+        decoded.append(value)
+    assert decoded == values
+
+
+def test_empty():
+    assert encode_varints([]) == b""
+    assert decode_varints(b"").size == 0
+
+    empty = pd.DataFrame({col: [] for col in COLUMNS})
+    decoded = decode(encode(empty))
+    assert list(decoded.columns) == COLUMNS
+    assert len(decoded) == 0
+
+
+def test_bad_magic():
+    data = encode(
+        pd.DataFrame(
+            {
+                "sector": ["Druze"],
+                "year": [2020],
+                "sex": ["F"],
+                "name": ["x"],
+                "n": [np.int64(7)],
+                "prop": [1.0],
+            }
+        )
+    )
+    with pytest.raises(ValueError):
+        decode(b"XXXX" + data[4:])
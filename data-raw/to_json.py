@@ -1,10 +1,28 @@
+import os
+
 import pandas as pd
-import json
 
-# Convert babynamesIL.csv
-df = pd.read_csv('data-raw/babynamesIL.csv')
-df.to_json('docs/data/babynamesIL.json', orient='records')
+from convert_to_json import BABYNAMES_CSV, DOCS_DIR, TOTALS_CSV
+
+
+def export_records(
+    babynames_path=BABYNAMES_CSV,
+    totals_path=TOTALS_CSV,
+    out_dir=os.path.join(DOCS_DIR, "data"),
+):
+    """Write each table as a JSON array of row records."""
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Convert babynamesIL.csv
+    df = pd.read_csv(babynames_path)
+    df.to_json(os.path.join(out_dir, "babynamesIL.json"), orient="records")
+
+    # Convert babynamesIL_totals.csv
+    df_totals = pd.read_csv(totals_path)
+    df_totals.to_json(
+        os.path.join(out_dir, "babynamesIL_totals.json"), orient="records"
+    )
+
 
-# Convert babynamesIL_totals.csv
-df_totals = pd.read_csv('data-raw/babynamesIL_totals.csv')
-df_totals.to_json('docs/data/babynamesIL_totals.json', orient='records')
\ No newline at end of file
+if __name__ == "__main__":
+    export_records()
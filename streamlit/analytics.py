@@ -0,0 +1,116 @@
+"""Name diversity and concentration for every (sector, year, sex).
+
+compute_analytics makes a single grouped pass over babynamesIL: the rows are
+assigned their (sector, year, sex) group once, and every metric is a
+weighted ``np.bincount`` over those group codes:
+
+    names         distinct names given that year
+    babies        babies given one of those names
+    entropy       Shannon entropy of the name distribution, in bits
+    top10_share   share of the babies given one of the 10 most given names
+    top50_share   the same for the 50 most given names
+    unisex_names  names given to both sexes in the sector that year
+
+A second table, "unisex", lists every (sector, year, name) given to both
+sexes with its count per sex and in total, the male/female ratio and the
+male share. load_analytics keeps both tables on disk keyed by a hash of the
+data, through the same data_cache.cached_pickle as load_highlights, and
+AnalyticsCube splits them once so that views read a dict instead of
+filtering rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_cache import CACHE_DIR, cached_pickle
+
+GROUP = ["sector", "year", "sex"]
+TOP_SHARES = [10, 50]
+METRICS = ["entropy", "top10_share", "top50_share", "names", "unisex_names"]
+
+
+def compute_analytics(babynames):
+    """The "metrics" and "unisex" tables of babynamesIL, as a dict of frames."""
+    grouped = babynames.groupby(GROUP, observed=True, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    metrics = grouped.size().index.to_frame(index=False)
+    n_groups = len(metrics)
+
+    n = babynames["n"].to_numpy(dtype=np.float64)
+    names = np.bincount(codes, minlength=n_groups)
+    babies = np.bincount(codes, weights=n, minlength=n_groups)
+    p = n / babies[codes]
+    metrics["names"] = names
+    metrics["babies"] = babies.astype(np.int64)
+    metrics["entropy"] = -np.bincount(codes, weights=p * np.log2(p), minlength=n_groups)
+
+    # Position of every row within its group, most given first
+    order = np.lexsort((-n, codes))
+    starts = np.cumsum(names) - names
+    position = np.empty(len(n), dtype=np.int64)
+    position[order] = np.arange(len(n)) - starts[codes[order]]
+    for k in TOP_SHARES:
+        top_n = np.bincount(codes, weights=n * (position < k), minlength=n_groups)
+        metrics[f"top{k}_share"] = top_n / babies
+
+    # Both sexes of a (sector, year, name) side by side
+    by_sex = (
+        babynames.set_index(["sector", "year", "name", "sex"])["n"]
+        .unstack("sex")
+        .dropna()
+    )
+    unisex = pd.DataFrame(
+        {
+            "n_F": by_sex["F"].astype(np.int64),
+            "n_M": by_sex["M"].astype(np.int64),
+        }
+    ).reset_index()
+    unisex["n"] = unisex["n_F"] + unisex["n_M"]
+    unisex["mf_ratio"] = unisex["n_M"] / unisex["n_F"]
+    unisex["male_share"] = unisex["n_M"] / unisex["n"]
+    unisex = unisex.sort_values(
+        ["sector", "year", "n"], ascending=[True, True, False], kind="stable"
+    ).reset_index(drop=True)
+
+    counts = unisex.groupby(["sector", "year"], observed=True).size()
+    metrics["unisex_names"] = (
+        counts.reindex(pd.MultiIndex.from_frame(metrics[["sector", "year"]]))
+        .fillna(0)
+        .astype(np.int64)
+        .to_numpy()
+    )
+    return {"metrics": metrics, "unisex": unisex}
+
+
+def load_analytics(babynames, cache_dir=CACHE_DIR):
+    """compute_analytics, cached on disk under a hash of the table."""
+    return cached_pickle(
+        "analytics", [babynames], lambda: compute_analytics(babynames), cache_dir
+    )
+
+
+class AnalyticsCube:
+    """The analytics tables, split by sector (metrics) and (sector, year) (unisex)."""
+
+    def __init__(self, analytics):
+        self.metrics = analytics["metrics"]
+        self.unisex = analytics["unisex"]
+        self.years = sorted(int(year) for year in self.metrics["year"].unique())
+        self.by_sector = {
+            sector: rows.reset_index(drop=True)
+            for sector, rows in self.metrics.groupby("sector", observed=True)
+        }
+        self.unisex_by_year = {
+            (sector, int(year)): rows.reset_index(drop=True)
+            for (sector, year), rows in self.unisex.groupby(
+                ["sector", "year"], observed=True
+            )
+        }
+
+    def sector_metrics(self, sector):
+        """Metrics of every (year, sex) of a sector, ordered by year."""
+        return self.by_sector.get(sector, self.metrics.iloc[:0])
+
+    def unisex_names(self, sector, year):
+        """Names given to both sexes in a sector and year, most given first."""
+        return self.unisex_by_year.get((sector, year), self.unisex.iloc[:0])
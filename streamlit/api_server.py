@@ -0,0 +1,379 @@
+"""Read-only JSON API over the data of the app.
+
+Serves the DataContext of streamlit_app.py from a threaded HTTP server of the
+standard library. Every endpoint answers from structures built once with the
+data (SeriesStore, the search indexes, highlights grouped by year and
+sector), so a request does not scan a table. Finished responses are kept in a
+bounded LRU keyed by path and query, together with their gzip encoding and a
+strong ETag, so a repeated query is a dict lookup and a client that sends the
+ETag back in If-None-Match gets a 304 without a body.
+
+Run from the repository root:
+
+    python streamlit/api_server.py --port 8502
+
+    curl 'http://localhost:8502/sectors'
+    curl 'http://localhost:8502/names?sector=Jewish&q=נו'
+    curl --compressed 'http://localhost:8502/series?sector=Jewish&name=נועם'
+    curl 'http://localhost:8502/top?sector=Muslim&year=2020&sex=F&k=10'
+    curl 'http://localhost:8502/highlights?kind=rising&sector=Jewish&year=2020'
+    curl 'http://localhost:8502/similar?sector=Jewish&sex=M&name=נועם'
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from highlights import group_highlights  # noqa: E402
+from lru_cache import LRUCache  # noqa: E402
+from name_search import MAX_MATCHES  # noqa: E402
+from series_store import SEXES  # noqa: E402
+from similar_names import SIMILAR_K  # noqa: E402
+from streamlit_app import (  # noqa: E402
+    DataContext,
+    data_version,
+    get_total_counts,
+    prepare_plot_data,
+)
+
+# Responses kept per process; most are a few kB
+RESPONSE_CACHE_SIZE = 4096
+# Bodies smaller than this are sent uncompressed
+GZIP_MIN_SIZE = 512
+MAX_TOP_K = 1000
+# Highlight tables computed by compute_highlights; "top" comes from the store
+HIGHLIGHT_KINDS = ["rising", "falling", "stable", "new", "rare", "top"]
+
+Response = namedtuple("Response", ["body", "gzip_body", "etag"])
+
+
+class ApiError(Exception):
+    """A request that cannot be answered, with the HTTP status to send."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def records(df):
+    """Rows of a frame as JSON-ready dicts, with NaN as null.
+
+    Ranks are floats in the frames only to hold NaN; they are sent as
+    integers, as in the CSVs and the static exports.
+    """
+    if "rank" in df and df["rank"].dtype.kind == "f":
+        df = df.assign(rank=df["rank"].astype("Int64"))
+    return json.loads(df.to_json(orient="records", force_ascii=False))
+
+
+def make_response(payload):
+    """Serialize a payload once, with its gzip encoding and a strong ETag."""
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+    digest = hashlib.sha1(body).hexdigest()[:20]
+    gzip_body = None
+    if len(body) >= GZIP_MIN_SIZE:
+        # mtime=0 keeps the encoding, and so its ETag, stable across restarts
+        gzip_body = gzip.compress(body, compresslevel=6, mtime=0)
+        if len(gzip_body) >= len(body):
+            gzip_body = None
+    return Response(body, gzip_body, digest)
+
+
+def accepts_gzip(header):
+    """Whether an Accept-Encoding header allows gzip (and not with q=0)."""
+    for coding in (header or "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            q = params.strip().lower()
+            if not q.startswith("q="):
+                return True
+            try:
+                return float(q[2:] or 0) != 0
+            except ValueError:
+                # A malformed weight does not allow the coding
+                continue
+    return False
+
+
+def opaque_tag(tag):
+    """An entity tag without its weakness indicator ``W/``."""
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(header, etag):
+    """Whether If-None-Match lists ``etag``, by weak comparison (RFC 9110)."""
+    if not header:
+        return False
+    tags = [opaque_tag(tag) for tag in header.split(",")]
+    return "*" in tags or opaque_tag(etag) in tags
+
+
+class BabynamesApi:
+    """Endpoints of the API over one DataContext, with a cache of responses."""
+
+    def __init__(self, data=None, cache_size=RESPONSE_CACHE_SIZE):
+        self.data = data if data is not None else DataContext(data_version())
+        self.highlights = group_highlights(self.data.highlights)
+        self.cache = LRUCache(cache_size)
+        self.endpoints = {
+            "/sectors": self.sectors,
+            "/names": self.names,
+            "/series": self.series,
+            "/top": self.top,
+            "/highlights": self.highlights_for,
+            "/similar": self.similar,
+        }
+
+    def respond(self, path, query):
+        """The cached Response of a GET; raises ApiError for bad requests."""
+        endpoint = self.endpoints.get(path)
+        if endpoint is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"unknown endpoint {path!r}")
+        key = (path, tuple(sorted(query.items())))
+        return self.cache.get_or_create(key, lambda: make_response(endpoint(query)))
+
+    def health(self):
+        return {"status": "ok", "version": self.data.version, **self.cache.stats()}
+
+    # Parameters
+
+    def sector(self, query):
+        sector = query.get("sector")
+        if sector not in self.data.names_by_sector:
+            sectors = ", ".join(self.data.names_by_sector)
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"sector must be one of {sectors}")
+        return sector
+
+    def integer(self, query, key, default=None, low=None, high=None):
+        value = query.get(key)
+        if value is None or value == "":
+            if default is None:
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"{key} is required")
+            return default
+        try:
+            value = int(value)
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"{key} must be an integer")
+        if (low is not None and value < low) or (high is not None and value > high):
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST, f"{key} must be between {low} and {high}"
+            )
+        return value
+
+    def sex(self, query, required=True):
+        sex = query.get("sex")
+        if sex is None and not required:
+            return None
+        if sex not in SEXES:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"sex must be one of {SEXES}")
+        return sex
+
+    def name(self, query):
+        name = query.get("name", "").strip()
+        if not name:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "name is required")
+        return name
+
+    # Endpoints
+
+    def sectors(self, query):
+        store = self.data.babynames_store
+        return {
+            "sectors": list(self.data.names_by_sector),
+            "years": [int(store.years[0]), int(store.years[-1])],
+            "sexes": SEXES,
+        }
+
+    def names(self, query):
+        """Names of a sector starting with ``q``, most popular first."""
+        sector = self.sector(query)
+        k = self.integer(query, "k", MAX_MATCHES, 1, MAX_TOP_K)
+        matches = self.data.name_search[sector].search(query.get("q", ""), k)
+        return {"sector": sector, "names": [str(name) for name in matches]}
+
+    def series(self, query):
+        """Yearly n, prop and rank of a name per sex, with its totals."""
+        sector, name = self.sector(query), self.name(query)
+        include_1948 = query.get("include_1948", "0").lower() in ("1", "true")
+        year_range = None
+        if query.get("start") or query.get("end"):
+            year_range = (
+                self.integer(query, "start", 0),
+                self.integer(query, "end", 9999),
+            )
+        store_1948 = self.data.datasets.store("1948") if include_1948 else None
+        frame = prepare_plot_data(
+            self.data.babynames_store,
+            sector,
+            name,
+            include_1948,
+            store_1948,
+            year_range,
+        )
+        total_m, total_f = get_total_counts(
+            self.data.babynames_store,
+            sector,
+            name,
+            store_1948,
+            include_1948,
+            year_range,
+        )
+        return {
+            "sector": sector,
+            "name": name,
+            "totals": {"F": total_f, "M": total_m},
+            "series": records(frame),
+        }
+
+    def top(self, query):
+        """The most given names of a sector, year and sex."""
+        sector, sex = self.sector(query), self.sex(query)
+        store = self.data.babynames_store
+        year = self.integer(
+            query, "year", low=int(store.years[0]), high=int(store.years[-1])
+        )
+        k = self.integer(query, "k", 10, 1, MAX_TOP_K)
+        frame = store.top(sector, year, sex, k)
+        return {"sector": sector, "year": year, "sex": sex, "top": records(frame)}
+
+    def highlights_for(self, query):
+        """One highlight table of a sector and year (optionally one sex)."""
+        kind = query.get("kind")
+        if kind not in HIGHLIGHT_KINDS:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST, f"kind must be one of {HIGHLIGHT_KINDS}"
+            )
+        if kind == "top":
+            return self.top({**query, "k": query.get("k") or "50"})
+        sector, sex = self.sector(query), self.sex(query, required=False)
+        year = None if kind == "rare" else self.integer(query, "year")
+        rows = self.highlights.get(kind, {}).get((year, sector))
+        if rows is not None and sex is not None:
+            rows = rows[rows["sex"] == sex]
+        return {
+            "kind": kind,
+            "sector": sector,
+            "year": year,
+            "sex": sex,
+            "names": [] if rows is None else records(rows),
+        }
+
+    def similar(self, query):
+        """Names whose popularity curve followed that of a name."""
+        sector, sex, name = self.sector(query), self.sex(query), self.name(query)
+        k = self.integer(query, "k", SIMILAR_K, 1, 100)
+        pairs = self.data.trajectories.similar(sector, sex, name, k)
+        return {
+            "sector": sector,
+            "sex": sex,
+            "name": name,
+            "similar": [{"name": other, "score": score} for other, score in pairs],
+        }
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """GET and HEAD of the API; the server's ``api`` attribute answers them."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; with Nagle's algorithm the body
+    # of a keep-alive response waits for the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+    server_version = "babynamesIL-api"
+    quiet = True
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def handle_request(self, send_body):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            response = make_response(self.server.api.health())
+            self.send(HTTPStatus.OK, response, send_body, cache=False)
+            return
+        try:
+            response = self.server.api.respond(url.path, dict(parse_qsl(url.query)))
+        except ApiError as error:
+            response = make_response({"error": str(error)})
+            self.send(error.status, response, send_body, cache=False)
+            return
+        self.send(HTTPStatus.OK, response, send_body)
+
+    def send(self, status, response, send_body, cache=True):
+        use_gzip = response.gzip_body is not None and accepts_gzip(
+            self.headers.get("Accept-Encoding")
+        )
+        body = response.gzip_body if use_gzip else response.body
+        # Strong ETags differ between the encodings of a response
+        etag = f'"{response.etag}{"-gz" if use_gzip else ""}"'
+
+        if cache and etag_matches(self.headers.get("If-None-Match"), etag):
+            status, body = HTTPStatus.NOT_MODIFIED, b""
+        self.send_response(status)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            if use_gzip:
+                self.send_header("Content-Encoding", "gzip")
+        if cache:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "public, max-age=3600")
+        else:
+            self.send_header("Cache-Control", "no-store")
+        self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+        if send_body and body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host="127.0.0.1", port=8502, api=None, verbose=False):
+    """A ThreadingHTTPServer answering with ``api`` (built from the data by default)."""
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    server.api = api if api is not None else BabynamesApi()
+    ApiHandler.quiet = not verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    server = make_server(args.host, args.port, verbose=args.verbose)
+    print(
+        f"Data loaded in {time.perf_counter() - start:.1f}s; "
+        f"serving on http://{args.host}:{server.server_port}"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Throughput and latency of api_server.py under concurrent clients.
+
+Starts the server in this process on a free port, checks the protocol
+(gzip, ETag and 304 round trips, errors) with a plain http.client, then runs
+``--clients`` keep-alive clients in parallel over a mix of queries: once
+against a cold response cache and once warm. Run from the repository root:
+
+    python streamlit/benchmarks/bench_api.py
+    python streamlit/benchmarks/bench_api.py --clients 16 --requests 500
+"""
+
+import argparse
+import concurrent.futures
+import gzip
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from api_server import BabynamesApi, make_server  # noqa: E402
+
+
+def get(conn, path, headers=None):
+    conn.request("GET", path, headers=headers or {})
+    response = conn.getresponse()
+    return response.status, dict(response.getheaders()), response.read()
+
+
+def check_protocol(port):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    path = "/series?" + urlencode({"sector": "Jewish", "name": "נועם"})
+
+    status, headers, plain_body = get(conn, path)
+    assert status == 200 and "Content-Encoding" not in headers, headers
+    series = json.loads(plain_body)["series"]
+    assert series and {"year", "sex", "n", "prop", "rank"} <= set(series[0])
+
+    status, gz_headers, gz_body = get(conn, path, {"Accept-Encoding": "gzip"})
+    assert status == 200 and gz_headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(gz_body) == plain_body
+    assert gz_headers["ETag"] != headers["ETag"]
+
+    status, _, body = get(conn, path, {"If-None-Match": headers["ETag"]})
+    assert status == 304 and body == b""
+    status, _, _ = get(
+        conn, path, {"If-None-Match": gz_headers["ETag"], "Accept-Encoding": "gzip"}
+    )
+    assert status == 304
+
+    assert get(conn, "/series?sector=Nowhere&name=x")[0] == 400
+    assert get(conn, "/nothing")[0] == 404
+    assert get(conn, "/health")[0] == 200
+    conn.close()
+    print(
+        f"protocol ok: series {len(plain_body)} B, gzip {len(gz_body)} B, "
+        "ETag/304, 400/404 errors"
+    )
+
+
+def query_mix(api, count, seed=0):
+    """Paths spread over every endpoint, with repeats as real traffic has."""
+    rng = random.Random(seed)
+    data = api.data
+    store = data.babynames_store
+    sectors = list(data.names_by_sector)
+    years = [int(year) for year in store.years]
+    paths = []
+    for _ in range(count):
+        sector = rng.choice(sectors)
+        # Popular names are asked for more often than rare ones
+        names = data.name_search[sector].search("", 200)
+        name = str(names[min(int(rng.expovariate(1 / 20)), len(names) - 1)])
+        sex = rng.choice(["F", "M"])
+        year = rng.choice(years[1:])
+        endpoint, params = rng.choice(
+            [
+                ("/series", {"sector": sector, "name": name}),
+                ("/series", {"sector": sector, "name": name, "start": year}),
+                ("/names", {"sector": sector, "q": name[:1]}),
+                ("/top", {"sector": sector, "year": year, "sex": sex}),
+                ("/highlights", {"kind": "rising", "sector": sector, "year": year}),
+                ("/similar", {"sector": sector, "sex": sex, "name": name}),
+            ]
+        )
+        paths.append(endpoint + "?" + urlencode(params))
+    return paths
+
+
+def run_clients(port, paths, clients):
+    """Latencies (seconds) of all paths, spread over keep-alive clients."""
+
+    def client(chunk):
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        latencies = []
+        for path in chunk:
+            start = time.perf_counter()
+            status, _, _ = get(conn, path, {"Accept-Encoding": "gzip"})
+            latencies.append(time.perf_counter() - start)
+            assert status == 200, (status, path)
+        conn.close()
+        return latencies
+
+    chunks = [paths[i::clients] for i in range(clients)]
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(clients) as pool:
+        latencies = [t for chunk in pool.map(client, chunks) for t in chunk]
+    return time.perf_counter() - start, np.array(latencies)
+
+
+def report(label, elapsed, latencies):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3
+    print(
+        f"  {label:<6} {len(latencies) / elapsed:8.0f} req/s   "
+        f"p50 {p50:6.2f} ms   p95 {p95:6.2f} ms   p99 {p99:6.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000, help="in total")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    api = BabynamesApi()
+    print(f"data loaded in {time.perf_counter() - start:.1f}s")
+    server = make_server(port=0, api=api)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        check_protocol(port)
+        paths = query_mix(api, args.requests)
+        print(
+            f"{args.requests} requests ({len(set(paths))} distinct), "
+            f"{args.clients} clients:"
+        )
+        api.cache = type(api.cache)(api.cache.maxsize)
+        report("cold", *run_clients(port, paths, args.clients))
+        report("warm", *run_clients(port, paths, args.clients))
+        print(f"  cache  {api.cache.stats()}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
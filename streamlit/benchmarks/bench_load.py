@@ -0,0 +1,66 @@
+"""Cold-start time and peak RSS of loading the tables from CSV vs. binary cache.
+
+Each measurement runs in a fresh interpreter. Run from the repository root
+after building the cache with ``python streamlit/data_cache.py``:
+
+    python streamlit/benchmarks/bench_load.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+STREAMLIT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+PROBE = """
+import json, resource, sys, time
+sys.path.insert(0, {streamlit_dir!r})
+import data_cache
+start = time.perf_counter()
+frames = [
+    data_cache.{loader}(path) for path in data_cache.TABLES
+]
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{"seconds": elapsed, "peak_rss_mb": rss}}))
+"""
+
+BASELINE = """
+import json, resource, time
+import pandas as pd
+start = time.perf_counter()
+frames = [pd.read_csv(path) for path in {tables!r}]
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{"seconds": elapsed, "peak_rss_mb": rss}}))
+"""
+
+
+def run(code, repeat=3):
+    results = [
+        json.loads(subprocess.check_output([sys.executable, "-c", code]))
+        for _ in range(repeat)
+    ]
+    return min(results, key=lambda r: r["seconds"])
+
+
+def main():
+    sys.path.insert(0, STREAMLIT_DIR)
+    import data_cache
+
+    probes = {
+        "csv (untyped)": BASELINE.format(tables=data_cache.TABLES),
+        "csv (typed)": PROBE.format(streamlit_dir=STREAMLIT_DIR, loader="read_csv"),
+        "binary cache": PROBE.format(streamlit_dir=STREAMLIT_DIR, loader="load_table"),
+    }
+    for label, code in probes.items():
+        result = run(code)
+        print(
+            f"{label:<15} {result['seconds'] * 1e3:8.1f} ms"
+            f"  peak RSS {result['peak_rss_mb']:6.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Microbenchmark: (sector, name) lookup by boolean masks vs. SeriesStore.
+
+A name's yearly counts come from SeriesStore.get instead of masking
+babynamesIL, and its per-sex totals from SeriesStore.totals instead of
+masking babynamesIL_totals. Run from the repository root:
+
+    python streamlit/benchmarks/bench_lookup.py
+"""
+
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_paths import DATASETS  # noqa: E402
+from series_store import SEXES, SeriesStore  # noqa: E402
+
+QUERIES = [
+    ("Jewish", "נועם"),
+    ("Muslim", "מוחמד"),
+    ("Druze", "אמיר"),
+    ("Christian-Arab", "שם-שלא-קיים"),
+]
+
+
+def mask_lookup(df, sector, name):
+    return df[(df.sector == sector) & (df.name == name)]
+
+
+def mask_totals(df, sector, name):
+    rows = mask_lookup(df, sector, name)
+    return rows.groupby("sex")["total"].sum().reindex(SEXES, fill_value=0).to_numpy()
+
+
+def check(df, totals_df, store, sector, name):
+    rows = mask_lookup(df, sector, name)
+    series = store.get(sector, name)
+    if series is None:
+        assert rows.empty
+    else:
+        n = np.zeros_like(series[0])
+        years = rows.year.to_numpy() - store.first_year
+        n[years, [SEXES.index(sex) for sex in rows.sex]] = rows.n
+        assert (n == series[0]).all()
+    assert (store.totals(sector, name) == mask_totals(totals_df, sector, name)).all()
+
+
+def bench(label, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number / len(QUERIES)
+    print(f"  {label:<20} {seconds * 1e6:10.1f} us/lookup")
+    return seconds
+
+
+def main():
+    df = pd.read_csv(DATASETS["babynames"])
+    totals_df = pd.read_csv(DATASETS["totals"])
+    store = SeriesStore(df)
+    build = min(timeit.repeat(lambda: SeriesStore(df), number=1, repeat=3))
+    print(f"babynamesIL: {len(df)} rows, SeriesStore build {build:.3f}s")
+    for query in QUERIES:
+        check(df, totals_df, store, *query)
+
+    masked = bench("series: masks", lambda: [mask_lookup(df, *q) for q in QUERIES], 20)
+    stored = bench("series: get", lambda: [store.get(*q) for q in QUERIES], 2000)
+    print(f"  speedup              {masked / stored:10.0f}x")
+
+    masked = bench(
+        "totals: masks", lambda: [mask_totals(totals_df, *q) for q in QUERIES], 20
+    )
+    stored = bench("totals: totals", lambda: [store.totals(*q) for q in QUERIES], 2000)
+    print(f"  speedup              {masked / stored:10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
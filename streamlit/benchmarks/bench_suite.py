@@ -0,0 +1,363 @@
+"""Benchmark suite of the app's data paths on synthetic data at several scales.
+
+For every scale the tables are generated with synthetic.py (once, then
+reused) and every data path of the app and of the static site export is
+timed on them. Results are written as JSON, one record per (scale,
+benchmark), together with the commit and library versions, so that runs of
+different commits can be compared.
+
+``--app-dir`` benchmarks the app of another checkout. AppAdapter calls it
+with the signatures of that commit, back to the baseline, so this copy of the
+suite measures every commit of the series. Run from the repository root:
+
+    git worktree add /tmp/baseline <commit>
+    python streamlit/benchmarks/bench_suite.py --app-dir /tmp/baseline/streamlit \
+        --scales 1 10 --output before.json
+    python streamlit/benchmarks/bench_suite.py --scales 1 10 --output after.json
+    python streamlit/benchmarks/bench_suite.py --compare before.json after.json
+
+Scale 100 (about 19 million rows) needs several GB of memory and is not run
+by default.
+"""
+
+import argparse
+import contextlib
+import importlib
+import inspect
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+STREAMLIT_DIR = os.path.normpath(os.path.join(BENCHMARKS_DIR, ".."))
+
+from synthetic import write_tables  # noqa: E402
+
+# Names looked up by the per-name benchmarks: the most popular names of every
+# sector and sex plus a deterministic sample of all names
+TOP_NAMES = 3
+RANDOM_NAMES = 20
+
+
+def measure(fn, repeat, calls=1):
+    """Seconds per call of ``fn`` over ``repeat`` runs of ``calls`` calls."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) / calls)
+    return times
+
+
+def optional_module(name):
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def uncached(fn):
+    """``fn`` without its st.cache_data wrapper, so that every call does the work."""
+    return getattr(fn, "__wrapped__", fn)
+
+
+class AppAdapter:
+    """The benchmarked calls, made the way the app of one checkout makes them.
+
+    Up to the DatasetRegistry, load_data returned the 1948 table as well and
+    was wrapped in st.cache_data. prepare_plot_data and get_total_counts took
+    DataFrames in the baseline, then a RowIndex (``*_index`` parameters),
+    then a SeriesStore (``*_store``); year ranges came later still. Modules a
+    checkout does not have (the binary cache, SeriesStore) skip their
+    benchmarks.
+    """
+
+    def __init__(self, app_dir=STREAMLIT_DIR):
+        self.app_dir = os.path.abspath(app_dir)
+        sys.path[:0] = [self.app_dir, os.path.join(self.app_dir, "..", "data-raw")]
+        self.app = importlib.import_module("streamlit_app")
+        self.convert_to_json = importlib.import_module("convert_to_json")
+        self.data_cache = optional_module("data_cache")
+        self.datasets = optional_module("datasets")
+        self.highlights = optional_module("highlights")
+        self.series_store = optional_module("series_store")
+        self.name_index = optional_module("name_index")
+        self.chart_cache = optional_module("chart_cache")
+        self.sources = {}
+
+    def clear_binary_cache(self):
+        for table in self.data_cache.TABLES:
+            path = self.data_cache.cache_path(table, self.data_cache.CACHE_DIR)
+            for name in os.listdir(path) if os.path.isdir(path) else []:
+                os.remove(os.path.join(path, name))
+
+    def load_data(self):
+        """(babynames, babynames_totals, babynames_1948), read anew."""
+        if self.datasets is None:
+            return uncached(self.app.load_data)()
+        datasets = self.datasets.DatasetRegistry()
+        babynames, babynames_totals = self.app.load_data(datasets)
+        return babynames, babynames_totals, datasets.get("1948")
+
+    def process_data(self, babynames):
+        return uncached(self.app.process_data)(babynames)
+
+    def compute_highlights(self, babynames, babynames_totals):
+        if self.highlights is None:
+            compute = uncached(self.app.compute_2024_highlights)
+        else:
+            compute = self.highlights.compute_highlights
+        return compute(babynames, babynames_totals)
+
+    def source(self, parameter, tables):
+        """The table ``parameter`` names, as a frame, a RowIndex or a SeriesStore."""
+        babynames, babynames_totals, babynames_1948 = tables
+        if "1948" in parameter:
+            df = babynames_1948
+        elif "totals" in parameter:
+            df = babynames_totals
+        else:
+            df = babynames
+        kind = parameter.rsplit("_", 1)[-1]
+        if df is None or kind not in ("index", "store"):
+            return df
+        key = (id(df), kind)
+        if key not in self.sources:
+            if kind == "store":
+                self.sources[key] = self.series_store.SeriesStore(df)
+            else:
+                self.sources[key] = self.name_index.RowIndex(df)
+        return self.sources[key]
+
+    def call(self, fn, args, year_range):
+        """``fn(*args)``, with the year range if this checkout's ``fn`` takes one."""
+        if "year_range" in inspect.signature(fn).parameters:
+            args = args + [year_range]
+        return fn(*args)
+
+    def prepare_plot_data(self, tables, sector, name, year_range):
+        fn = self.app.prepare_plot_data
+        parameters = list(inspect.signature(fn).parameters)
+        babynames = self.source(parameters[0], tables)
+        babynames_1948 = self.source(parameters[4], tables)
+        return self.call(
+            fn, [babynames, sector, name, True, babynames_1948], year_range
+        )
+
+    def get_total_counts(self, tables, sector, name, year_range):
+        fn = self.app.get_total_counts
+        parameters = list(inspect.signature(fn).parameters)
+        totals = self.source(parameters[0], tables)
+        babynames_1948 = self.source(parameters[3], tables)
+        return self.call(fn, [totals, sector, name, babynames_1948, True], year_range)
+
+    def line_chart_spec(self, data, name, t, year_range):
+        args = [data, name, "prop", t, False]
+        chart = self.call(self.app.get_line_chart, args, year_range)
+        if self.chart_cache is None:
+            return chart.to_dict()
+        return self.chart_cache.chart_spec(chart)
+
+    def convert_data_for_static_site(self, out_dir):
+        convert = self.convert_to_json.convert_data_for_static_site
+        if not inspect.signature(convert).parameters:
+            # The baseline reads data-raw/*.csv and writes docs/ relative to data-raw
+            with contextlib.chdir("data-raw"):
+                return convert()
+        return convert(
+            "data-raw/babynamesIL.csv",
+            "data-raw/babynamesIL_totals.csv",
+            os.path.join(out_dir, "data.json"),
+            os.path.join(out_dir, "data.json.gz"),
+        )
+
+
+def sample_names(babynames_totals, seed=0):
+    top = babynames_totals.sort_values("total", ascending=False, kind="stable")
+    top = top.groupby(["sector", "sex"], observed=True).head(TOP_NAMES)
+    rest = babynames_totals.sample(RANDOM_NAMES, random_state=seed)
+    pairs = pd.concat([top, rest])[["sector", "name"]].astype(str)
+    return list(dict.fromkeys(map(tuple, pairs.to_numpy())))
+
+
+def run_scale(adapter, scale, work_dir, repeat):
+    """Time every benchmark on the synthetic tables of ``scale``.
+
+    Runs with ``work_dir/scale-<scale>`` as the working directory, since the
+    app reads its tables from relative data-raw/ paths.
+    """
+    scale_dir = os.path.join(work_dir, f"scale-{scale}")
+    write_tables(scale_dir, scale)
+    os.chdir(scale_dir)
+    results = {}
+
+    def bench(label, fn, calls=1, times=repeat):
+        results[label] = (measure(fn, times, calls), calls)
+
+    # Cold loads: from the CSVs, then from a freshly built binary cache
+    if adapter.data_cache is not None:
+        adapter.clear_binary_cache()
+    bench("load_data (csv)", adapter.load_data)
+    if adapter.data_cache is not None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            adapter.data_cache.build_caches()
+        bench("load_data (cache)", adapter.load_data)
+
+    tables = adapter.load_data()
+    babynames, babynames_totals, babynames_1948 = tables
+    # Indexes and stores of the previous scale are keyed by their tables' ids
+    adapter.sources.clear()
+    rows = {
+        "babynames": len(babynames),
+        "totals": len(babynames_totals),
+        "1948": len(babynames_1948),
+    }
+
+    bench("process_data", lambda: adapter.process_data(babynames))
+    bench(
+        "compute_highlights",
+        lambda: adapter.compute_highlights(babynames, babynames_totals),
+        times=min(repeat, 3),
+    )
+    if adapter.series_store is not None:
+        bench("SeriesStore", lambda: adapter.series_store.SeriesStore(babynames))
+
+    pairs = sample_names(babynames_totals)
+    years = babynames["year"]
+    year_range = (int(years.min()), int(years.max()))
+
+    def plot_data():
+        for sector, name in pairs:
+            adapter.prepare_plot_data(tables, sector, name, year_range)
+
+    def total_counts():
+        for sector, name in pairs:
+            adapter.get_total_counts(tables, sector, name, year_range)
+
+    plots = {
+        (sector, name): adapter.prepare_plot_data(tables, sector, name, year_range)
+        for sector, name in pairs[:5]
+    }
+    t = adapter.app.translations["English"]
+
+    def line_chart():
+        for (sector, name), data in plots.items():
+            adapter.line_chart_spec(data, name, t, year_range)
+
+    bench("prepare_plot_data", plot_data, calls=len(pairs))
+    bench("get_total_counts", total_counts, calls=len(pairs))
+    bench("get_line_chart", line_chart, calls=len(plots))
+
+    out_dir = os.path.join(scale_dir, "docs")
+    with contextlib.redirect_stdout(io.StringIO()):
+        bench(
+            "convert_data_for_static_site",
+            lambda: adapter.convert_data_for_static_site(out_dir),
+            times=min(repeat, 3),
+        )
+
+    return [
+        {
+            "scale": scale,
+            "benchmark": label,
+            "rows": rows,
+            "calls": calls,
+            "repeat": len(times),
+            "min_s": min(times),
+            "median_s": statistics.median(times),
+            "times_s": times,
+        }
+        for label, (times, calls) in results.items()
+    ]
+
+
+def git_commit(app_dir):
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "HEAD"], cwd=app_dir, stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before_path, after_path):
+    """Print the median time of every benchmark in two result files."""
+    with open(before_path) as f:
+        before = {(r["scale"], r["benchmark"]): r for r in json.load(f)["results"]}
+    with open(after_path) as f:
+        after = {(r["scale"], r["benchmark"]): r for r in json.load(f)["results"]}
+
+    print(f"{'scale':>5} {'benchmark':<30} {'before':>11} {'after':>11} {'ratio':>7}")
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key]["median_s"], after[key]["median_s"]
+        print(
+            f"{key[0]:>5} {key[1]:<30} {old * 1e3:9.2f}ms {new * 1e3:9.2f}ms"
+            f" {new / old:6.2f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--work-dir",
+        default=os.path.join(tempfile.gettempdir(), "babynamesIL-bench"),
+        help="where the synthetic tables are generated and kept between runs",
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument(
+        "--app-dir",
+        default=STREAMLIT_DIR,
+        help="streamlit/ directory of the checkout to benchmark (default: this one)",
+    )
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two results"
+    )
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    output = os.path.abspath(args.output) if args.output else None
+    adapter = AppAdapter(args.app_dir)
+    results = []
+    for scale in args.scales:
+        work_dir = os.path.abspath(args.work_dir)
+        for record in run_scale(adapter, scale, work_dir, args.repeat):
+            print(
+                f"{record['scale']:>5}x {record['benchmark']:<30}"
+                f" {record['median_s'] * 1e3:10.2f} ms"
+            )
+            results.append(record)
+
+    report = {
+        "commit": git_commit(adapter.app_dir),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""Load test: many concurrent sessions against one running Streamlit server.
+
+Starts ``streamlit run streamlit_app.py`` headless on a free port and keeps
+``--concurrency`` sessions connected to it at a time, each speaking the
+browser's websocket protocol. A session goes through a random sequence of
+interactions (sector, name search and selection, statistic, the 1948 toggle,
+the language) and times every rerun, from sending the widget states to the
+end of the script run. All sessions share the server's DataContext,
+cache_resource entries, chart cache and GIL, as real users do. The reported
+peak RSS is the server's. Everything runs offline. From the repository root:
+
+    python streamlit/benchmarks/load_test.py --sessions 32 --concurrency 8
+
+The first session's "start" includes loading the data into the server.
+Pass ``--data-dir`` to run against other tables, e.g. a synthetic scale
+directory written by bench_suite.py.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+STREAMLIT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP = os.path.join(STREAMLIT_DIR, "streamlit_app.py")
+
+# Seconds a single rerun may take before the session counts as failed
+RERUN_TIMEOUT = 120
+# Seconds the server may take to start answering
+START_TIMEOUT = 60
+
+# Interactions and how often they are picked
+ACTIONS = {
+    "sector": 2,
+    "search": 4,
+    "name": 4,
+    "stat": 2,
+    "include_1948": 1,
+    "language": 1,
+}
+
+# Widgets the sessions send back, and the WidgetState field of their value
+VALUE_FIELDS = {
+    "checkbox": "bool_value",
+    "selectbox": "int_value",
+    "radio": "int_value",
+    "text_input": "string_value",
+    "multiselect": "int_array_value",
+    "slider": "double_array_value",
+}
+
+# Root containers of the delta paths
+MAIN, SIDEBAR = 0, 1
+
+
+class Session:
+    """A browser tab: the widgets of the last run and the values it sends back."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        # Delta path -> (widget type, widget proto) of the last run, in page order
+        self.widgets = {}
+        # Widget id -> value set by an interaction
+        self.values = {}
+        # Hash -> message, for the messages the server sends by reference
+        self.messages = {}
+
+    def value(self, widget):
+        if widget.id in self.values:
+            return self.values[widget.id]
+        if widget.set_value:
+            return widget.value
+        return widget.default
+
+    def widget_states(self):
+        states = []
+        for kind, widget in self.widgets.values():
+            state = WidgetState(id=widget.id)
+            value = self.value(widget)
+            if kind in ("multiselect", "slider"):
+                getattr(state, VALUE_FIELDS[kind]).data.extend(value)
+            else:
+                setattr(state, VALUE_FIELDS[kind], value)
+            states.append(state)
+        return states
+
+    async def receive(self):
+        raw = await asyncio.wait_for(self.ws.read_message(), RERUN_TIMEOUT)
+        if raw is None:
+            raise ConnectionError("the server closed the session")
+        msg = ForwardMsg()
+        msg.ParseFromString(raw)
+        if msg.WhichOneof("type") == "ref_hash":
+            # Sent before in this session: the content comes from our copy
+            path = list(msg.metadata.delta_path)
+            msg = self.messages[msg.ref_hash]
+            return msg, tuple(path)
+        self.messages[msg.hash] = msg
+        return msg, tuple(msg.metadata.delta_path)
+
+    async def rerun(self):
+        """Send the widget states and wait for the script run; returns its seconds."""
+        back_msg = BackMsg()
+        back_msg.rerun_script.widget_states.widgets.extend(self.widget_states())
+        start = time.perf_counter()
+        await self.ws.write_message(back_msg.SerializeToString(), binary=True)
+
+        widgets = {}
+        while True:
+            msg, path = await self.receive()
+            kind = msg.WhichOneof("type")
+            if kind == "script_finished":
+                break
+            if kind != "delta" or msg.delta.WhichOneof("type") != "new_element":
+                continue
+            element = msg.delta.new_element
+            element_type = element.WhichOneof("type")
+            if element_type == "exception":
+                raise RuntimeError(element.exception.message)
+            if element_type in VALUE_FIELDS:
+                widgets[path] = (element_type, getattr(element, element_type))
+        elapsed = time.perf_counter() - start
+
+        if msg.script_finished != ForwardMsg.FINISHED_SUCCESSFULLY:
+            raise RuntimeError(f"script run ended with status {msg.script_finished}")
+        self.widgets = dict(sorted(widgets.items()))
+        return elapsed
+
+    def find(self, kind, root=MAIN, prefix=()):
+        """Widgets of a type under a root container (and block), in page order."""
+        return [
+            widget
+            for path, (widget_type, widget) in self.widgets.items()
+            if widget_type == kind and path[0] == root and path[: len(prefix)] == prefix
+        ]
+
+    def interact(self, rng, action):
+        """Apply one interaction to the widget values, without rerunning."""
+        # The name explorer is the block holding the search box
+        search = next(
+            (path, widget)
+            for path, (kind, widget) in self.widgets.items()
+            if kind == "text_input"
+        )
+        explorer = search[0][:-1]
+        selectboxes = self.find("selectbox", prefix=explorer)
+        if action == "sector":
+            sector = selectboxes[0]
+            self.values[sector.id] = rng.randrange(len(sector.options))
+        elif action == "search":
+            # A prefix of one of the names on screen, or a cleared search
+            names = selectboxes[1].options if len(selectboxes) > 1 else []
+            name = rng.choice(names) if names else ""
+            self.values[search[1].id] = name[: rng.randint(0, len(name))]
+        elif action == "name":
+            if len(selectboxes) < 2:
+                # The last search matched nothing
+                self.values[search[1].id] = ""
+            else:
+                names = selectboxes[1]
+                self.values[names.id] = rng.randrange(len(names.options))
+        elif action == "stat":
+            stat = self.find("radio", prefix=explorer)[0]
+            self.values[stat.id] = (self.value(stat) + 1) % len(stat.options)
+        elif action == "include_1948":
+            toggle = self.find("checkbox", root=SIDEBAR)[0]
+            self.values[toggle.id] = not self.value(toggle)
+        elif action == "language":
+            language = self.find("selectbox", root=SIDEBAR)[0]
+            self.values[language.id] = (self.value(language) + 1) % len(
+                language.options
+            )
+
+
+async def run_session(port, seed, steps):
+    """One session: the first run, then ``steps`` random interactions."""
+    rng = random.Random(seed)
+    ws = await websocket_connect(f"ws://127.0.0.1:{port}/_stcore/stream")
+    try:
+        session = Session(ws)
+        timings = [("start", await session.rerun())]
+        actions, weights = zip(*ACTIONS.items())
+        for _ in range(steps):
+            action = rng.choices(actions, weights)[0]
+            session.interact(rng, action)
+            timings.append((action, await session.rerun()))
+        return timings
+    finally:
+        ws.close()
+
+
+async def run_sessions(port, sessions, steps, concurrency, seed=0):
+    """Run sessions, ``concurrency`` of them at a time.
+
+    Returns the (action, seconds) timings of all reruns, the errors of the
+    failed sessions and the wall time.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    timings, errors = [], []
+
+    async def session(i):
+        async with slots:
+            try:
+                timings.extend(await run_session(port, seed + i, steps))
+            except Exception as error:  # noqa: BLE001 - reported, not raised
+                errors.append(repr(error))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    return timings, errors, time.perf_counter() - start
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(data_dir, port, log):
+    """Start the app headless in ``data_dir`` and wait until it answers."""
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "streamlit",
+            "run",
+            APP,
+            "--server.headless=true",
+            "--server.address=127.0.0.1",
+            f"--server.port={port}",
+            "--server.fileWatcherType=none",
+            "--browser.gatherUsageStats=false",
+        ],
+        cwd=data_dir,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline and server.poll() is None:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health"):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    server.wait()
+    log.seek(0)
+    raise RuntimeError(f"the server did not start:\n{log.read().decode()[-2000:]}")
+
+
+def stop_server(server):
+    """Stop the server; returns its peak RSS in MB."""
+    server.terminate()
+    server.wait(timeout=30)
+    # The server is the only child process, so this is its high-water mark
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+
+def percentiles(seconds):
+    p50, p95, p99 = np.percentile(seconds, [50, 95, 99]) * 1e3
+    return {"count": len(seconds), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+
+
+def summarize(timings, errors, wall, concurrency, peak_rss):
+    by_action = {}
+    for action, elapsed in timings:
+        by_action.setdefault(action, []).append(elapsed)
+    return {
+        "reruns": len(timings),
+        "failed_sessions": len(errors),
+        "errors": errors,
+        "wall_s": wall,
+        "reruns_per_s": len(timings) / wall if wall else 0.0,
+        "concurrency": concurrency,
+        "server_peak_rss_mb": peak_rss,
+        "all": percentiles([elapsed for _, elapsed in timings]) if timings else {},
+        "by_action": {
+            action: percentiles(seconds) for action, seconds in by_action.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument(
+        "--steps", type=int, default=20, help="interactions per session"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="sessions connected to the server at the same time",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--data-dir",
+        default=os.getcwd(),
+        help="directory holding data-raw/ (default: the current directory)",
+    )
+    parser.add_argument("--output", help="write the summary to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryFile() as log:
+        port = free_port()
+        server = start_server(os.path.abspath(args.data_dir), port, log)
+        try:
+            timings, errors, wall = asyncio.run(
+                run_sessions(
+                    port, args.sessions, args.steps, args.concurrency, args.seed
+                )
+            )
+        finally:
+            peak_rss = stop_server(server)
+    summary = summarize(timings, errors, wall, args.concurrency, peak_rss)
+
+    print(
+        f"{summary['reruns']} reruns in {wall:.1f}s"
+        f" ({summary['reruns_per_s']:.1f}/s), {args.concurrency} concurrent"
+        f" sessions, {len(errors)} failed sessions, server peak RSS"
+        f" {peak_rss:.0f} MB"
+    )
+    print(f"{'action':<14} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for action, row in {"all": summary["all"], **summary["by_action"]}.items():
+        if row:
+            print(
+                f"{action:<14} {row['count']:>6} {row['p50_ms']:7.1f}ms"
+                f" {row['p95_ms']:7.1f}ms {row['p99_ms']:7.1f}ms"
+            )
+    for error in errors[:5]:
+        print(f"error: {error}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
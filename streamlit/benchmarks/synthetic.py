@@ -0,0 +1,165 @@
+"""Deterministic synthetic versions of the data-raw tables at any scale.
+
+The generated tables have the columns, dtypes and shape of the real ones:
+every (sector, sex) gets a pool of names whose popularity follows a Zipf law,
+each name is in use for a limited span of years with a rise and a fall, and
+rows with fewer than 5 babies are dropped as in the CBS publication. At
+scale 1 the tables are within about 20% of the real row counts; scale ``k``
+multiplies both the number of names and the births by ``k``, so proportions
+stay comparable.
+
+Write the tables for scale 10 under ``/tmp/bench-10/data-raw`` with:
+
+    python streamlit/benchmarks/synthetic.py 10 /tmp/bench-10
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+FIRST_YEAR = 1949
+LAST_YEAR = 2024
+LEGACY_YEAR = 1948
+
+# Distinct names and average births per year of every (sector, sex) in the
+# real data (1949-2024)
+PROFILES = {
+    ("Jewish", "F"): (2300, 46000),
+    ("Jewish", "M"): (1700, 48000),
+    ("Muslim", "F"): (1650, 10000),
+    ("Muslim", "M"): (800, 11500),
+    ("Christian-Arab", "F"): (390, 450),
+    ("Christian-Arab", "M"): (260, 600),
+    ("Druze", "F"): (440, 470),
+    ("Druze", "M"): (320, 600),
+}
+
+# Sector names of the 1948 table
+LEGACY_SECTORS = {"Christian-Arab": "Christian"}
+
+# Share of the births of 1949 recorded in the 1948 table
+LEGACY_BIRTHS = 0.2
+
+MIN_COUNT = 5
+
+HEBREW_LETTERS = "אבגדהוזחטיכלמנסעפצקרשת"
+
+
+def make_names(count):
+    """``count`` distinct Hebrew-letter names of three letters or more."""
+    base = len(HEBREW_LETTERS)
+    codes = np.arange(count) + base**2
+    names = []
+    for code in codes.tolist():
+        letters = []
+        while code:
+            code, digit = divmod(code, base)
+            letters.append(HEBREW_LETTERS[digit])
+        names.append("".join(letters))
+    return names
+
+
+def simulate_group(rng, name_ids, births, years):
+    """Counts of the names of one (sector, sex) as a (names x years) array."""
+    n_names = len(name_ids)
+    weight = 1.0 / np.arange(1, n_names + 1) ** 0.8
+    weight = rng.permutation(weight)
+
+    # Every name rises and falls around a peak year, over a random span
+    peak = rng.uniform(years[0] - 20, years[-1] + 20, size=n_names)
+    width = rng.gamma(2.0, 5.0, size=n_names) + 2
+    shape = np.exp(-0.5 * ((years[None, :] - peak[:, None]) / width[:, None]) ** 2)
+
+    # Births grow over the years as in the real data (roughly x2.5)
+    yearly = births * np.linspace(0.6, 1.4, len(years))
+    expected = weight[:, None] * shape
+    expected *= yearly / expected.sum(axis=0)
+    return rng.poisson(expected).astype(np.int32)
+
+
+def to_rows(sector, sex, names, years, counts):
+    """Long (sector, year, sex, name, n, prop) rows with at least MIN_COUNT babies."""
+    prop = counts / np.maximum(counts.sum(axis=0), 1)
+    name_idx, year_idx = np.nonzero(counts >= MIN_COUNT)
+    return pd.DataFrame(
+        {
+            "sector": sector,
+            "year": years[year_idx],
+            "sex": sex,
+            "name": np.asarray(names, dtype=object)[name_idx],
+            "n": counts[name_idx, year_idx],
+            "prop": prop[name_idx, year_idx].round(7),
+        }
+    )
+
+
+def generate(scale=1, seed=0):
+    """The babynames, totals and 1948 tables at ``scale``, as data frames."""
+    rng = np.random.default_rng(seed)
+    years = np.arange(FIRST_YEAR, LAST_YEAR + 1)
+    largest = max(n_names for n_names, _ in PROFILES.values())
+    # Groups draw from one pool, so names are shared between sectors and sexes
+    pool = make_names(int(largest * scale * 1.5))
+
+    babynames, legacy = [], []
+    for (sector, sex), (n_names, births) in PROFILES.items():
+        name_ids = rng.choice(len(pool), size=int(n_names * scale), replace=False)
+        names = [pool[i] for i in name_ids]
+        counts = simulate_group(rng, name_ids, births * scale, years)
+        babynames.append(to_rows(sector, sex, names, years, counts))
+
+        # The 1948 table: a small cohort of the names in use in 1949
+        counts_1948 = rng.poisson(counts[:, :1] * LEGACY_BIRTHS).astype(np.int32)
+        legacy_sector = LEGACY_SECTORS.get(sector, sector)
+        legacy.append(
+            to_rows(legacy_sector, sex, names, np.array([LEGACY_YEAR]), counts_1948)
+        )
+
+    babynames = pd.concat(babynames, ignore_index=True)
+    babynames_totals = (
+        babynames.groupby(["sector", "sex", "name"], sort=False)["n"]
+        .sum()
+        .rename("total")
+        .reset_index()
+        .sort_values(["sector", "sex", "total"], ascending=[True, True, False])
+        .reset_index(drop=True)
+    )
+    babynames_1948 = pd.concat(legacy, ignore_index=True)
+    return babynames, babynames_totals, babynames_1948
+
+
+def write_tables(out_dir, scale=1, seed=0):
+    """Write the generated tables to ``out_dir/data-raw`` under their real names.
+
+    Returns the path of the data-raw directory. Tables already generated for
+    the same scale and seed are kept.
+    """
+    data_raw = os.path.join(out_dir, "data-raw")
+    stamp = os.path.join(data_raw, f".synthetic-{scale}-{seed}")
+    if os.path.exists(stamp):
+        return data_raw
+
+    os.makedirs(data_raw, exist_ok=True)
+    babynames, babynames_totals, babynames_1948 = generate(scale, seed)
+    babynames.to_csv(os.path.join(data_raw, "babynamesIL.csv"), index=False)
+    babynames_totals.to_csv(
+        os.path.join(data_raw, "babynamesIL_totals.csv"), index=False
+    )
+    babynames_1948.to_csv(os.path.join(data_raw, "babynamesIL_1948.csv"), index=False)
+    open(stamp, "w").close()
+    return data_raw
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scale", type=int, help="multiple of the real data size")
+    parser.add_argument("out_dir", help="directory to create data-raw/ in")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    data_raw = write_tables(args.out_dir, args.scale, args.seed)
+    for table in sorted(os.listdir(data_raw)):
+        if table.endswith(".csv"):
+            rows = sum(1 for _ in open(os.path.join(data_raw, table))) - 1
+            print(f"{os.path.join(data_raw, table)}: {rows:,} rows")
@@ -0,0 +1,31 @@
+"""Bounded LRU cache of finished Vega-Lite chart specs.
+
+Building and serializing an Altair chart costs tens of milliseconds, while
+rendering an already serialized spec is about a millisecond. The app keeps one
+ChartCache per data version (see DataContext), keyed by everything the chart
+depends on, so repeat views of the same chart skip its construction.
+"""
+
+import altair as alt
+
+from lru_cache import LRUCache
+
+# Number of specs kept per process; a line chart spec is a few tens of kB
+CHART_CACHE_SIZE = 512
+
+
+def chart_spec(chart):
+    """Vega-Lite spec of an Altair chart, with the data inlined.
+
+    The default Altair theme is disabled the same way st.altair_chart does,
+    so the spec renders identically through st.vega_lite_chart.
+    """
+    with alt.themes.enable("none"):
+        return chart.to_dict()
+
+
+class ChartCache(LRUCache):
+    """LRU of chart specs, keyed by everything a chart depends on."""
+
+    def __init__(self, maxsize=CHART_CACHE_SIZE):
+        super().__init__(maxsize)
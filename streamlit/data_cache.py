@@ -0,0 +1,299 @@
+"""Compact schema and typed binary cache of the data-raw CSV tables.
+
+Every table is loaded with the dtypes in SCHEMA, and the categorical columns
+in SHARED_CATEGORIES use one dictionary across all tables (see
+share_categories), so each distinct name is stored once per process.
+
+Each table is stored as a directory of NumPy ``.npy`` files, one per column,
+plus a ``meta.json`` holding the column order, dtypes and the categories of
+the categorical columns, and the SHA-256 of the CSV it was built from. The
+cache is used while the CSV still hashes the same, so a CSV rewritten with
+the same content (a checkout, a copy, a re-run of process_cbs_data.py) keeps
+it, as it does in data-raw/build.py. Reading the cache memory-maps the column
+files, so a cold start does not parse any text.
+
+Build or refresh the caches, or print how much memory the compact schema
+saves, from the repository root with:
+
+    python streamlit/data_cache.py
+    python streamlit/data_cache.py --memory-report
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from data_paths import CACHE_DIR, TABLES, file_hash
+
+# Compact dtypes for every column that appears in the data-raw tables
+SCHEMA = {
+    "sector": "category",
+    "sex": "category",
+    "name": "category",
+    "year": "int16",
+    "n": "int32",
+    "total": "int32",
+    "prop": "float32",
+}
+
+# Categorical columns whose dictionary is shared by all tables
+SHARED_CATEGORIES = ["name"]
+
+# Legacy sector names and the current name they are read as. The 1948 table
+# calls the Christian-Arab sector "Christian"; no table uses both names.
+SECTOR_ALIASES = {"Christian": "Christian-Arab"}
+
+
+def cache_path(csv_path, cache_dir=CACHE_DIR):
+    table = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, table)
+
+
+def read_csv(csv_path):
+    """Read a data-raw CSV with the compact schema applied."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    return pd.read_csv(
+        csv_path, dtype={col: SCHEMA[col] for col in header if col in SCHEMA}
+    )
+
+
+def write_cache(df, path, source_hash=None):
+    """Write ``df`` as a cache; ``source_hash`` is the file_hash of its CSV."""
+    os.makedirs(path, exist_ok=True)
+    meta = {"columns": [], "categories": {}, "source_sha256": source_hash}
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(path, f"{col}.npy"), values.cat.codes.to_numpy())
+            meta["categories"][col] = values.cat.categories.tolist()
+        else:
+            np.save(os.path.join(path, f"{col}.npy"), values.to_numpy())
+        meta["columns"].append(col)
+
+    # meta.json is written last and marks the cache as complete
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+
+def read_cache(path):
+    """Load a cached table, memory-mapping its column files."""
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    columns = {}
+    for col in meta["columns"]:
+        values = np.load(os.path.join(path, f"{col}.npy"), mmap_mode="r")
+        if col in meta["categories"]:
+            values = pd.Categorical.from_codes(values, meta["categories"][col])
+        columns[col] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def is_fresh(csv_path, path):
+    """Whether the cache at ``path`` exists and was built from ``csv_path`` as it is."""
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return meta.get("source_sha256") == file_hash(csv_path)
+
+
+def normalize_sectors(df):
+    """Rename legacy sectors (SECTOR_ALIASES) in place and return ``df``."""
+    if "sector" in df.columns:
+        sectors = df["sector"].cat.categories
+        if sectors.isin(list(SECTOR_ALIASES)).any():
+            df["sector"] = df["sector"].cat.rename_categories(
+                lambda sector: SECTOR_ALIASES.get(sector, sector)
+            )
+    return df
+
+
+def load_table(csv_path, cache_dir=CACHE_DIR):
+    """Load a table from its binary cache if fresh, otherwise from the CSV.
+
+    Sector names are normalized, so every table uses the current names.
+    """
+    path = cache_path(csv_path, cache_dir)
+    if os.path.exists(csv_path) and is_fresh(csv_path, path):
+        return normalize_sectors(read_cache(path))
+    return normalize_sectors(read_csv(csv_path))
+
+
+def share_categories(frames, columns=SHARED_CATEGORIES):
+    """Recode categorical columns of several frames onto one shared dictionary.
+
+    ``frames`` may contain ``None`` entries, which are skipped. The frames are
+    modified in place and returned.
+    """
+    for col in columns:
+        present = [df for df in frames if df is not None and col in df.columns]
+        if not present:
+            continue
+        categories = sorted(set().union(*(df[col].cat.categories for df in present)))
+        dtype = pd.CategoricalDtype(categories)
+        for df in present:
+            # Categorical dtypes compare equal whatever the order of their
+            # categories, but the codes are only valid under the same order
+            if df[col].cat.categories.equals(dtype.categories):
+                # Same categories (e.g. read from the cache): only swap in the
+                # shared dictionary, the codes stay valid
+                codes = df[col].cat.codes.to_numpy()
+                df[col] = pd.Categorical.from_codes(codes, dtype=dtype)
+            else:
+                df[col] = df[col].astype(dtype)
+    return frames
+
+
+def adopt_categories(df, reference, columns=SHARED_CATEGORIES):
+    """Reuse the dictionaries of ``reference`` in ``df`` where they are equal.
+
+    Used for tables loaded after the shared dictionary was built: a table read
+    from a cache written by build_caches carries the same categories, and
+    adopting the existing dtype avoids keeping a second copy of them. Unlike
+    share_categories, ``reference`` is never modified.
+    """
+    for col in columns:
+        if col in df.columns and col in reference.columns:
+            dtype = reference[col].dtype
+            categories = df[col].cat.categories
+            if categories is not dtype.categories and categories.equals(
+                dtype.categories
+            ):
+                codes = df[col].cat.codes.to_numpy()
+                df[col] = pd.Categorical.from_codes(codes, dtype=dtype)
+    return df
+
+
+def load_tables(csv_paths=TABLES, optional=(), cache_dir=CACHE_DIR):
+    """Load several tables with the compact schema and shared dictionaries.
+
+    Paths listed in ``optional`` yield ``None`` when the CSV is missing.
+    """
+    frames = []
+    for csv_path in csv_paths:
+        if csv_path in optional and not os.path.exists(csv_path):
+            frames.append(None)
+        else:
+            frames.append(load_table(csv_path, cache_dir))
+    return share_categories(frames)
+
+
+def memory_report(csv_paths=TABLES):
+    """Print the per-column memory of the tables read as-is vs. the compact schema."""
+    existing = [path for path in csv_paths if os.path.exists(path)]
+    compact = dict(zip(existing, share_categories([read_csv(p) for p in existing])))
+    total_before = total_after = 0
+    shared = {}
+
+    print(f"{'table':<28} {'column':<8} {'default':>12} {'compact':>12}")
+    for path in existing:
+        before = pd.read_csv(path).memory_usage(deep=True, index=False)
+        table = os.path.basename(path)
+        for col, default_bytes in before.items():
+            values = compact[path][col]
+            if col in SHARED_CATEGORIES:
+                # Only the codes belong to the table; the dictionary is shared
+                compact_bytes = values.cat.codes.nbytes
+                shared[col] = values.cat.categories
+            else:
+                compact_bytes = values.memory_usage(deep=True, index=False)
+            print(f"{table:<28} {col:<8} {default_bytes:>12,} {compact_bytes:>12,}")
+            total_before += default_bytes
+            total_after += compact_bytes
+
+    for col, categories in shared.items():
+        dictionary_bytes = categories.memory_usage(deep=True)
+        print(f"{'(shared dictionary)':<28} {col:<8} {'':>12} {dictionary_bytes:>12,}")
+        total_after += dictionary_bytes
+    print(f"{'total':<28} {'':<8} {total_before:>12,} {total_after:>12,}")
+
+
+def content_hash(*frames):
+    """Hash of the contents of one or more frames, stable across processes."""
+    digest = hashlib.sha1()
+    for df in frames:
+        digest.update(",".join(df.columns).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def pickle_path(prefix, frames, cache_dir=CACHE_DIR):
+    """Path of the ``prefix`` pickle derived from ``frames``."""
+    return os.path.join(cache_dir, f"{prefix}-{content_hash(*frames)}.pkl")
+
+
+def cached_pickle(prefix, frames, compute, cache_dir=CACHE_DIR):
+    """``compute()``, pickled under a hash of ``frames`` and reused while they match.
+
+    Every Streamlit worker on a host calls this at startup. The pickle is
+    written to a temporary file and renamed into place, so readers see either
+    no file or a complete one. A pickle that cannot be read is a cache miss.
+    Pickles of the same prefix under other hashes are removed.
+    """
+    path = pickle_path(prefix, frames, cache_dir)
+    try:
+        return pd.read_pickle(path)
+    except Exception:
+        # Missing, or written by an incompatible version of the code
+        pass
+
+    value = compute()
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f"{prefix}-", suffix=".tmp", dir=cache_dir
+        )
+        os.close(fd)
+        pd.to_pickle(value, tmp_path)
+        os.replace(tmp_path, path)
+        tmp_path = None
+        for stale in glob.glob(os.path.join(cache_dir, f"{prefix}-*.pkl")):
+            if stale != path:
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    # Removed by another worker
+                    pass
+    except OSError:
+        # A read-only checkout still works, it just recomputes on start
+        pass
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return value
+
+
+def build_caches(tables=TABLES, cache_dir=CACHE_DIR):
+    for csv_path in tables:
+        if not os.path.exists(csv_path):
+            print(f"Skipping {csv_path} (not found)")
+    existing = [path for path in tables if os.path.exists(path)]
+
+    # Written with the shared dictionaries so loading needs no recoding
+    frames = share_categories([read_csv(path) for path in existing])
+    for csv_path, df in zip(existing, frames):
+        path = cache_path(csv_path, cache_dir)
+        write_cache(df, path, file_hash(csv_path))
+        print(f"Cached {csv_path} -> {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--memory-report",
+        action="store_true",
+        help="print per-column memory before and after the compact schema",
+    )
+    args = parser.parse_args()
+    if args.memory_report:
+        memory_report()
+    else:
+        build_caches()
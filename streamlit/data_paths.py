@@ -0,0 +1,34 @@
+"""Where the data-raw tables and their exports live, relative to the repository root.
+
+The app runs from the repository root and opens these paths as they are.
+The scripts in data-raw join them to the root, so they work from any
+directory. Everything that reads a table, or writes a cache or an export of
+one, takes its path from here, and tells whether a file changed by its
+file_hash.
+"""
+
+import hashlib
+
+# Tables by dataset name
+DATASETS = {
+    "babynames": "data-raw/babynamesIL.csv",
+    "totals": "data-raw/babynamesIL_totals.csv",
+    "1948": "data-raw/babynamesIL_1948.csv",
+    "other": "data-raw/babynamesIL_other.csv",
+}
+TABLES = list(DATASETS.values())
+
+# Binary caches and pickles derived from the tables
+CACHE_DIR = "data-raw/cache"
+
+# Static site exports
+DOCS_DIR = "docs"
+
+
+def file_hash(path):
+    """SHA-256 of a file's bytes. Rewriting or touching it keeps the hash."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,76 @@
+"""Registry of the app's datasets, each loaded the first time it is used.
+
+The main tables are loaded together when the app starts (they share one name
+dictionary, see data_cache.load_tables). The auxiliary tables, the 1948
+legacy data and the archived "Other" sector, are only read when a session
+first asks for them. All tables go through data_cache.load_table, so their
+sector names are already normalized and a legacy table is indexed with the
+same (sector, name) keys as the main one.
+"""
+
+import os
+import threading
+
+from data_cache import CACHE_DIR, adopt_categories, load_tables
+from data_paths import DATASETS
+from series_store import SeriesStore
+
+# Loaded at startup; all other datasets are optional and loaded on demand
+MAIN_DATASETS = ["babynames", "totals"]
+
+
+class DatasetRegistry:
+    """Lazily loaded tables and SeriesStores, by dataset name.
+
+    A single registry is shared by all sessions (it lives on DataContext), so
+    every table and store is built at most once per process.
+    """
+
+    def __init__(self, paths=DATASETS, cache_dir=CACHE_DIR):
+        self.paths = dict(paths)
+        self.cache_dir = cache_dir
+        self.tables = {}
+        self.stores = {}
+        self.lock = threading.Lock()
+
+    def load(self, *names):
+        """Load the named tables, those not loaded yet sharing one dictionary.
+
+        Returns the tables in the order given. A missing auxiliary CSV yields
+        ``None``; a missing main CSV raises FileNotFoundError.
+        """
+        with self.lock:
+            pending = [name for name in names if name not in self.tables]
+            if pending:
+                paths = [self.paths[name] for name in pending]
+                optional = [
+                    self.paths[name] for name in pending if name not in MAIN_DATASETS
+                ]
+                frames = load_tables(paths, optional, self.cache_dir)
+                reference = self.tables.get(MAIN_DATASETS[0])
+                for name, df in zip(pending, frames):
+                    if df is not None and reference is not None:
+                        adopt_categories(df, reference)
+                    self.tables[name] = df
+            return [self.tables[name] for name in names]
+
+    def get(self, name):
+        """The table of a dataset, or ``None`` if its CSV is missing."""
+        return self.load(name)[0]
+
+    def store(self, name):
+        """The SeriesStore of a dataset, or ``None`` if its CSV is missing."""
+        if name not in self.stores:
+            df = self.get(name)
+            store = SeriesStore(df) if df is not None else None
+            with self.lock:
+                self.stores.setdefault(name, store)
+        return self.stores[name]
+
+    def available(self, name):
+        """Whether a dataset can be loaded, without loading it."""
+        return name in self.tables or os.path.exists(self.paths[name])
+
+    def loaded(self):
+        """Names of the datasets whose tables are in memory."""
+        return [name for name, df in self.tables.items() if df is not None]
@@ -0,0 +1,131 @@
+"""Year-over-year highlights for every year pair, sector and sex.
+
+compute_highlights compares each year with the previous one for all years at
+once: the table is joined with itself shifted by one year, and every
+highlight table is a filter followed by a per-(year, sector, sex) top-N.
+load_highlights keeps the result on disk, keyed by a hash of the data.
+"""
+
+import pandas as pd
+
+from data_cache import CACHE_DIR, cached_pickle
+
+GROUP = ["year", "sector", "sex"]
+KEYS = ["sector", "sex", "name"]
+
+# Minimal change in proportion for a name to count as rising or falling
+PROP_CHANGE_THRESHOLD = 0.001
+TOP_N = 50
+
+
+def year_over_year(babynames):
+    """Join each (sector, sex, name, year) with the same name in the previous year.
+
+    Names missing from one of the two years get zeros, so a name that drops
+    out appears in the year after its last occurrence with ``n == 0``.
+    """
+    columns = KEYS + ["year", "n", "prop"]
+    current = babynames[columns]
+    previous = current.assign(year=current["year"] + 1)
+    changes = current.merge(
+        previous, on=KEYS + ["year"], how="outer", suffixes=("", "_prev")
+    )
+    first_year, last_year = babynames["year"].min(), babynames["year"].max()
+    changes = changes[changes["year"].between(first_year + 1, last_year)]
+
+    changes = changes.fillna({"n": 0, "prop": 0, "n_prev": 0, "prop_prev": 0})
+    changes = changes.astype({"n": "int32", "n_prev": "int32"})
+    changes["prop_change"] = changes["prop"] - changes["prop_prev"]
+    return changes.reset_index(drop=True)
+
+
+def top_per_group(df, column, n=TOP_N, ascending=False):
+    """The first ``n`` rows of every (year, sector, sex) group ordered by ``column``."""
+    ordered = df.sort_values(
+        GROUP + [column], ascending=[True] * len(GROUP) + [ascending], kind="stable"
+    )
+    rank = ordered.groupby(GROUP, observed=True).cumcount() + 1
+    return ordered[rank <= n].assign(rank=rank[rank <= n]).reset_index(drop=True)
+
+
+def compute_highlights(babynames, babynames_totals=None, top_n=TOP_N):
+    """Highlights of every year against the previous year, per sector and sex.
+
+    Returns a dict of frames. "rising", "falling", "stable" and "new" hold up
+    to ``top_n`` names per (year, sector, sex), where ``year`` is the later
+    year of the pair; "rare" holds names with fewer than 100 babies in total.
+    The most given names of a year are not included: they are a slice of the
+    ranks precomputed by SeriesStore (see SeriesStore.top).
+    """
+    changes = year_over_year(babynames)
+    change = changes["prop_change"]
+
+    highlights = {
+        # Rising / falling names (proportion change beyond the threshold)
+        "rising": top_per_group(
+            changes[change > PROP_CHANGE_THRESHOLD], "prop_change", top_n
+        ),
+        "falling": top_per_group(
+            changes[change < -PROP_CHANGE_THRESHOLD],
+            "prop_change",
+            top_n,
+            ascending=True,
+        ),
+        # Stable names (small change but given to more than 50 babies)
+        "stable": top_per_group(
+            changes[(change.abs() < PROP_CHANGE_THRESHOLD) & (changes["n"] > 50)],
+            "n",
+            top_n,
+        ),
+        # New to the top (under 10 babies in the previous year, at least 50 now)
+        "new": top_per_group(
+            changes[(changes["n_prev"] < 10) & (changes["n"] >= 50)], "n", top_n
+        ),
+    }
+
+    # Rare names from totals
+    if babynames_totals is not None:
+        highlights["rare"] = babynames_totals[
+            babynames_totals["total"] < 100
+        ].reset_index(drop=True)
+
+    return highlights
+
+
+def select_highlights(highlights, kind, year, sector, sex=None):
+    """Rows of one highlight table for a year and sector (and optionally sex)."""
+    df = highlights.get(kind)
+    if df is None:
+        return pd.DataFrame()
+    mask = (df["year"] == year) & (df["sector"] == sector)
+    if sex is not None:
+        mask &= df["sex"] == sex
+    return df[mask]
+
+
+def group_highlights(highlights):
+    """Split every highlight table into its (year, sector) groups, once.
+
+    Returns ``{kind: {(year, sector): frame}}``; "rare", which has no year,
+    is keyed by ``(None, sector)``. Looking a group up is then a dict read
+    instead of the masks of select_highlights.
+    """
+    grouped = {}
+    for kind, df in highlights.items():
+        keys = ["sector"] if "year" not in df.columns else ["year", "sector"]
+        grouped[kind] = {
+            (None, *key) if len(keys) == 1 else key: rows.reset_index(drop=True)
+            for key, rows in df.groupby(keys, observed=True, sort=False)
+        }
+    return grouped
+
+
+def load_highlights(babynames, babynames_totals=None, cache_dir=CACHE_DIR):
+    """compute_highlights, cached on disk under a hash of the input tables."""
+    tables = [babynames] if babynames_totals is None else [babynames, babynames_totals]
+    return cached_pickle(
+        "highlights",
+        tables,
+        lambda: compute_highlights(babynames, babynames_totals),
+        cache_dir,
+    )
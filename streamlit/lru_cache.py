@@ -0,0 +1,62 @@
+"""Bounded, thread-safe LRU cache shared by the threads of one process.
+
+Holds the finished chart specs of the app (ChartCache in chart_cache.py) and
+the responses of api_server.py.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe LRU mapping of keys to values, with hit/miss counters.
+
+    Sessions (or requests) run in threads of the same process and share the
+    cache. The factory of a missing key runs outside the lock, so two threads
+    missing the same key at once may both build it; the values are equal
+    either way.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.values = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.values
+
+    def __len__(self):
+        return len(self.values)
+
+    def get_or_create(self, key, factory):
+        """The value stored under ``key``, calling ``factory()`` to build it on a miss."""
+        with self.lock:
+            value = self.values.get(key)
+            if value is not None:
+                self.values.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = factory()
+        with self.lock:
+            self.values[key] = value
+            self.values.move_to_end(key)
+            while len(self.values) > self.maxsize:
+                self.values.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": len(self.values),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,105 @@
+"""Prefix search over the names of a sector, ranked by popularity.
+
+Names and queries are normalized the same way before matching: niqqud and
+cantillation marks are removed, the different geresh/gershayim characters are
+unified and final letters are folded to their regular form, so "נועמ", "נועם"
+and "נוֹעַם" all find נועם.
+"""
+
+import bisect
+import re
+
+import numpy as np
+
+# Hebrew points and cantillation marks (niqqud, dagesh, shin/sin dots, ...)
+MARKS = re.compile("[\u0591-\u05bd\u05bf\u05c1\u05c2\u05c4\u05c5\u05c7]")
+
+FOLD = str.maketrans(
+    {
+        # Final letters
+        "ך": "כ",
+        "ם": "מ",
+        "ן": "נ",
+        "ף": "פ",
+        "ץ": "צ",
+        # Geresh and apostrophe variants
+        "\u05f3": "'",
+        "\u2019": "'",
+        "\u2018": "'",
+        "`": "'",
+        "\u00b4": "'",
+        # Gershayim and double quote variants
+        "\u05f4": '"',
+        "\u201c": '"',
+        "\u201d": '"',
+        # Maqaf
+        "\u05be": "-",
+    }
+)
+
+# Upper bound for the names sent to the browser per search
+MAX_MATCHES = 20
+
+
+def normalize(text):
+    return MARKS.sub("", text).translate(FOLD).strip().lower()
+
+
+class NameSearchIndex:
+    """Sorted normalized keys of a sector's names with their popularity.
+
+    A prefix query is two bisections into the sorted keys followed by a
+    top-k selection (argpartition) over the matching range.
+    """
+
+    def __init__(self, names, popularity):
+        keys = [normalize(name) for name in names]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = [keys[i] for i in order]
+        self.names = np.array(names, dtype=object)[order]
+        self.popularity = np.asarray(popularity, dtype=np.int64)[order]
+        self.name_set = set(names)
+
+    def __contains__(self, name):
+        return name in self.name_set
+
+    def __len__(self):
+        return len(self.keys)
+
+    def search(self, query, k=MAX_MATCHES):
+        """Up to ``k`` names starting with ``query``, most popular first.
+
+        A name that equals the query (after normalization) comes first.
+        """
+        prefix = normalize(query)
+        start = bisect.bisect_left(self.keys, prefix)
+        stop = bisect.bisect_left(self.keys, prefix + "\uffff", lo=start)
+        # Exact matches sort first within the range of the prefix
+        exact = bisect.bisect_right(self.keys, prefix, lo=start, hi=stop)
+        matches = list(self.names[start:exact][:k])
+
+        popularity = self.popularity[exact:stop]
+        k = k - len(matches)
+        if k <= 0 or popularity.size == 0:
+            return matches
+        if popularity.size > k:
+            top = np.argpartition(-popularity, k - 1)[:k]
+        else:
+            top = np.arange(popularity.size)
+        top = top[np.argsort(-popularity[top], kind="stable")]
+        return matches + list(self.names[exact:stop][top])
+
+
+def build_search_indexes(babynames_totals):
+    """One NameSearchIndex per sector, ranked by total babies of both sexes."""
+    popularity = (
+        babynames_totals.groupby(["sector", "name"], observed=True)["total"]
+        .sum()
+        .reset_index()
+    )
+    return {
+        sector: NameSearchIndex(
+            sector_df["name"].astype(str).tolist(), sector_df["total"].to_numpy()
+        )
+        for sector, sector_df in popularity.groupby("sector", observed=True)
+    }
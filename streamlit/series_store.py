@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+
+# Order of the sex axis; matches the (sex, year) sort order of the plot data.
+SEXES = ["F", "M"]
+
+
+def rank_names(n):
+    """Rank of every name within each (year, sex) of a (names x years x sexes) block.
+
+    Returns ``(rank, order)``: ``rank`` holds 1 for the most given name, tied
+    names share the best rank (like ``rank(method="min")``) and names with no
+    babies get 0; ``order[:, year, sex]`` lists the names by decreasing
+    ``n``. Both are computed for all (year, sex) columns at once.
+    """
+    order = np.argsort(-n, axis=0, kind="stable").astype(np.int32)
+    ordered = np.take_along_axis(n, order, axis=0)
+    # Position of the first name of every run of equal counts
+    position = np.arange(n.shape[0], dtype=np.int32).reshape(-1, 1, 1)
+    first = np.zeros(ordered.shape, dtype=np.int32)
+    first[1:] = np.where(ordered[1:] != ordered[:-1], position[1:], 0)
+    np.maximum.accumulate(first, axis=0, out=first)
+    rank = np.empty_like(first)
+    np.put_along_axis(rank, order, first + 1, axis=0)
+    rank[n == 0] = 0
+    return rank, order
+
+
+class SeriesStore:
+    """Dense per-sector arrays of ``n``, ``prop`` and rank indexed by (name, year, sex).
+
+    Every sector gets one ``int32`` block for ``n`` and one ``float32`` block
+    for ``prop``, both of shape (names x years x sexes) and zero where the
+    table has no row. A name's gap-filled time series is therefore a slice of
+    these blocks, with no merges at request time. Per-sector prefix sums of
+    ``n`` over the years make the total of any year range two array reads,
+    and the ranks of every (year, sex), computed once, make a name's rank a
+    read and a year's top names a slice.
+    """
+
+    def __init__(self, df):
+        self.first_year = int(df.year.min())
+        self.years = np.arange(self.first_year, int(df.year.max()) + 1)
+        self.names = {}
+        self.rows = {}
+        self.n = {}
+        self.prop = {}
+        self.cum_n = {}
+        self.rank = {}
+        self.order = {}
+
+        for sector, sector_df in df.groupby("sector", sort=False, observed=True):
+            name_codes, names = pd.factorize(sector_df.name, sort=True)
+            year_codes = sector_df.year.to_numpy() - self.first_year
+            sex_codes = pd.Categorical(sector_df.sex, categories=SEXES).codes
+            shape = (len(names), len(self.years), len(SEXES))
+
+            n = np.zeros(shape, dtype=np.int32)
+            n[name_codes, year_codes, sex_codes] = sector_df.n.to_numpy()
+            prop = np.zeros(shape, dtype=np.float32)
+            prop[name_codes, year_codes, sex_codes] = sector_df.prop.to_numpy()
+
+            self.names[sector] = list(names)
+            self.rows[sector] = {name: i for i, name in enumerate(names)}
+            self.n[sector] = n
+            self.prop[sector] = prop
+            # cum_n[:, i] is the sum of n over the first i years
+            cum_n = np.zeros((shape[0], shape[1] + 1, shape[2]), dtype=np.int32)
+            np.cumsum(n, axis=1, out=cum_n[:, 1:])
+            self.cum_n[sector] = cum_n
+            self.rank[sector], self.order[sector] = rank_names(n)
+
+    def get(self, sector, name):
+        """Return the (years x sexes) ``n``, ``prop`` and rank arrays of a name.
+
+        Returns ``None`` if the name does not appear in the sector.
+        """
+        row = self.rows.get(sector, {}).get(name)
+        if row is None:
+            return None
+        return self.n[sector][row], self.prop[sector][row], self.rank[sector][row]
+
+    def get_many(self, pairs):
+        """Stacked (pairs x years x sexes) ``n``, ``prop`` and rank of (sector, name) pairs.
+
+        Pairs that are not in the store get zeros. Rows are gathered with one
+        fancy-indexing read per sector, so the cost grows with the number of
+        pairs, not with the size of the table.
+        """
+        shape = (len(pairs), len(self.years), len(SEXES))
+        n = np.zeros(shape, dtype=np.int32)
+        prop = np.zeros(shape, dtype=np.float32)
+        rank = np.zeros(shape, dtype=np.int32)
+        by_sector = {}
+        for i, (sector, name) in enumerate(pairs):
+            row = self.rows.get(sector, {}).get(name)
+            if row is not None:
+                positions, rows = by_sector.setdefault(sector, ([], []))
+                positions.append(i)
+                rows.append(row)
+        for sector, (positions, rows) in by_sector.items():
+            n[positions] = self.n[sector][rows]
+            prop[positions] = self.prop[sector][rows]
+            rank[positions] = self.rank[sector][rows]
+        return n, prop, rank
+
+    def top(self, sector, year, sex, k):
+        """The ``k`` most given names of a (sector, year, sex), most given first.
+
+        A frame of (name, n, prop, rank) sliced from the precomputed order;
+        names with no babies that year are left out.
+        """
+        if sector not in self.order or not 0 <= year - self.first_year < len(
+            self.years
+        ):
+            return pd.DataFrame(columns=["name", "n", "prop", "rank"])
+        y, s = year - self.first_year, SEXES.index(sex)
+        rows = self.order[sector][:k, y, s]
+        n = self.n[sector][rows, y, s]
+        rows, n = rows[n > 0], n[n > 0]
+        return pd.DataFrame(
+            {
+                "name": np.array(self.names[sector], dtype=object)[rows],
+                "n": n,
+                "prop": self.prop[sector][rows, y, s],
+                "rank": self.rank[sector][rows, y, s],
+            }
+        )
+
+    def totals(self, sector, name, start_year=None, end_year=None):
+        """Per-sex totals (ordered as SEXES) of a name over a range of years.
+
+        The range is inclusive and defaults to all years of the store.
+        """
+        row = self.rows.get(sector, {}).get(name)
+        if row is None:
+            return np.zeros(len(SEXES), dtype=np.int64)
+        start = 0 if start_year is None else start_year - self.first_year
+        stop = len(self.years) if end_year is None else end_year - self.first_year + 1
+        start = min(max(start, 0), len(self.years))
+        stop = min(max(stop, start), len(self.years))
+        cum_n = self.cum_n[sector][row]
+        return cum_n[stop].astype(np.int64) - cum_n[start]
+
+
+def rank_values(rank):
+    """Ranks as floats, with NaN where the name was not given (rank 0)."""
+    return np.where(rank > 0, rank, np.nan).astype(np.float32)
+
+
+def series_frame(years, n, prop, rank=None):
+    """Long-form (year, sex, n, prop[, rank]) frame of a series, trimmed to its active years.
+
+    Years before the first and after the last non-zero count are dropped;
+    gaps in between are kept as zeros (NaN for the rank). Rows are ordered by
+    sex, then year.
+    """
+    columns = ["year", "sex", "n", "prop"] + (["rank"] if rank is not None else [])
+    active = np.flatnonzero(n.any(axis=1))
+    if active.size == 0:
+        return pd.DataFrame(columns=columns)
+    span = slice(active[0], active[-1] + 1)
+    years = years[span]
+    frame = {
+        "year": np.tile(years, len(SEXES)),
+        "sex": np.repeat(SEXES, len(years)),
+        "n": n[span].T.ravel(),
+        "prop": prop[span].T.ravel(),
+    }
+    if rank is not None:
+        frame["rank"] = rank_values(rank[span].T.ravel())
+    return pd.DataFrame(frame)
+
+
+def comparison_frame(pairs, years, n, prop, rank=None):
+    """Long-form (sector, name, year, sex, n, prop[, rank]) frame of stacked series.
+
+    ``n``, ``prop`` and ``rank`` have shape (pairs x years x sexes) as
+    returned by SeriesStore.get_many. Sexes with no babies in any of the
+    years are left out.
+    """
+    n_pairs, n_years = len(pairs), len(years)
+    sectors = np.array([sector for sector, _ in pairs], dtype=object)
+    names = np.array([name for _, name in pairs], dtype=object)
+    keep = np.repeat(n.any(axis=1).ravel(), n_years)
+    per_series = len(SEXES) * n_years
+    frame = pd.DataFrame(
+        {
+            "sector": np.repeat(sectors, per_series),
+            "name": np.repeat(names, per_series),
+            "year": np.tile(years, n_pairs * len(SEXES)),
+            "sex": np.tile(np.repeat(SEXES, n_years), n_pairs),
+            "n": n.transpose(0, 2, 1).ravel(),
+            "prop": prop.transpose(0, 2, 1).ravel(),
+        }
+    )
+    if rank is not None:
+        frame["rank"] = rank_values(rank.transpose(0, 2, 1).ravel())
+    return frame[keep].reset_index(drop=True)
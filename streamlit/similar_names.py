@@ -0,0 +1,77 @@
+"""Names whose popularity over the years followed a similar curve.
+
+For every (sector, sex) the ``prop`` series of all names form a (names x
+years) matrix taken from a SeriesStore. Each row is centered on its mean and
+scaled to unit L2 norm, so the dot product of two rows is the Pearson
+correlation of the two curves (with ``metric="cosine"`` the rows are only
+scaled, and the dot product is their cosine similarity). A query is then a
+single matrix-vector product followed by an argpartition top-k, and its
+result is cached.
+"""
+
+import functools
+
+import numpy as np
+
+from series_store import SEXES
+
+METRICS = ["correlation", "cosine"]
+SIMILAR_K = 10
+
+# Queries kept per index
+CACHE_SIZE = 1024
+
+
+class TrajectoryIndex:
+    """Normalized ``prop`` curves of every (sector, sex), for similarity queries."""
+
+    def __init__(self, store, metric="correlation"):
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {METRICS}, not {metric!r}")
+        self.metric = metric
+        self.years = store.years
+        self.names = {}
+        self.rows = {}
+        self.matrices = {}
+        for sector, prop in store.prop.items():
+            for i, sex in enumerate(SEXES):
+                curves = prop[:, :, i].astype(np.float32)
+                # Names never given to this sex in this sector are left out
+                keep = np.flatnonzero(curves.any(axis=1))
+                curves = curves[keep]
+                if metric == "correlation":
+                    curves = curves - curves.mean(axis=1, keepdims=True)
+                norms = np.linalg.norm(curves, axis=1, keepdims=True)
+                # A flat curve has no correlation with anything
+                curves = np.divide(
+                    curves, norms, out=np.zeros_like(curves), where=norms > 0
+                )
+                names = [store.names[sector][j] for j in keep]
+                self.names[sector, sex] = names
+                self.rows[sector, sex] = {name: j for j, name in enumerate(names)}
+                self.matrices[sector, sex] = curves
+        self.similar = functools.lru_cache(maxsize=CACHE_SIZE)(self._similar)
+
+    def __contains__(self, key):
+        sector, sex, name = key
+        return name in self.rows.get((sector, sex), {})
+
+    def _similar(self, sector, sex, name, k=SIMILAR_K):
+        """The ``k`` names most similar to ``name``, as (name, similarity) pairs.
+
+        Pairs are ordered by decreasing similarity and exclude the name itself.
+        An unknown (sector, sex, name) gives an empty tuple.
+        """
+        row = self.rows.get((sector, sex), {}).get(name)
+        if row is None:
+            return ()
+        matrix = self.matrices[sector, sex]
+        scores = matrix @ matrix[row]
+        scores[row] = -np.inf
+        k = min(k, len(scores) - 1)
+        if k <= 0:
+            return ()
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        names = self.names[sector, sex]
+        return tuple((names[j], float(scores[j])) for j in top)
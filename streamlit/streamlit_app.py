@@ -1,7 +1,20 @@
+import hashlib
+import os
+
 import streamlit as st
 import pandas as pd
+import numpy as np
 import altair as alt
 
+from analytics import METRICS, AnalyticsCube, load_analytics
+from chart_cache import ChartCache, chart_spec
+from datasets import DATASETS, MAIN_DATASETS, DatasetRegistry
+from highlights import load_highlights, select_highlights
+from name_search import MAX_MATCHES, build_search_indexes
+from series_store import SEXES, comparison_frame, series_frame
+from similar_names import TrajectoryIndex
+from tracing import DEBUG, HISTORY, NULL_TRACE, Trace, write_trace
+
 
 def set_custom_css():
     st.markdown(
@@ -37,10 +50,14 @@ translations = {
         "sector": "Sector:",
         "statistic": "Statistic:",
         "name": "Name:",
+        "search": "Search name:",
+        "compare": "Compare with:",
+        "no_matches": "No matching names.",
         "name_prefix": "The name",
         "name_suffix": "over time",
         "total_number": "Total number",
         "percent_in_year": "Percent in year",
+        "rank": "Rank",
         "male_babies": "male babies",
         "female_babies": "female babies",
         "year": "Year",
@@ -55,7 +72,11 @@ translations = {
         "male": "Male",
         "female": "Female",
         "include_1948": "Include 1948 (legacy data)",
-        "highlights_2024": "2024 Highlights",
+        "year_range": "Years:",
+        "similar_names": "Names that trended like",
+        "similarity": "Similarity",
+        "highlights": "Highlights",
+        "highlights_year": "Year:",
         "trend_filter": "Filter by trend:",
         "popularity_filter": "Filter by popularity:",
         "rising": "Rising",
@@ -65,16 +86,32 @@ translations = {
         "top_10": "Top 10",
         "top_50": "Top 50",
         "rare": "Rare (< 100 total)",
+        "names_tab": "Names",
+        "analytics_tab": "Diversity",
+        "metric": "Metric:",
+        "entropy": "Diversity (entropy, bits)",
+        "top10_share": "Share of the top 10 names",
+        "top50_share": "Share of the top 50 names",
+        "names": "Distinct names",
+        "unisex_names": "Names given to both sexes",
+        "unisex_in": "Names given to both sexes in",
+        "male_share": "Male share",
+        "mf_ratio": "Male/female ratio",
+        "no_unisex": "No name was given to both sexes that year.",
     },
     "Hebrew": {
         "title": "שמות תינוקות בישראל",
         "sector": ":מגזר",
         "statistic": ":סטטיסטיקה",
         "name": ":שם",
+        "search": ":חיפוש שם",
+        "compare": ":השוואה עם",
+        "no_matches": "לא נמצאו שמות תואמים.",
         "name_prefix": "השם",
         "name_suffix": "במהלך השנים",
         "total_number": "מספר כולל",
         "percent_in_year": "אחוז בשנה",
+        "rank": "דירוג",
         "male_babies": "תינוקות זכרים",
         "female_babies": "תינוקות נקבות",
         "year": "שנה",
@@ -89,7 +126,11 @@ translations = {
         "male": "זכר",
         "female": "נקבה",
         "include_1948": "כלול 1948 (נתונים היסטוריים)",
-        "highlights_2024": "נקודות עניין 2024",
+        "year_range": ":שנים",
+        "similar_names": "שמות עם מגמה דומה ל",
+        "similarity": "דמיון",
+        "highlights": "נקודות עניין",
+        "highlights_year": ":שנה",
         "trend_filter": ":סינון לפי מגמה",
         "popularity_filter": ":סינון לפי פופולריות",
         "rising": "עולים",
@@ -99,164 +140,278 @@ translations = {
         "top_10": "10 המובילים",
         "top_50": "50 המובילים",
         "rare": "נדירים (< 100 סה״כ)",
+        "names_tab": "שמות",
+        "analytics_tab": "גיוון",
+        "metric": ":מדד",
+        "entropy": "גיוון (אנטרופיה, ביטים)",
+        "top10_share": "חלקם של 10 השמות המובילים",
+        "top50_share": "חלקם של 50 השמות המובילים",
+        "names": "מספר שמות שונים",
+        "unisex_names": "שמות שניתנו לשני המינים",
+        "unisex_in": "שמות שניתנו לשני המינים ב",
+        "male_share": "חלק הזכרים",
+        "mf_ratio": "יחס זכרים/נקבות",
+        "no_unisex": "אף שם לא ניתן לשני המינים בשנה זו.",
     },
 }
 
 
-@st.cache_data
-def load_data():
-    babynames = pd.read_csv("data-raw/babynamesIL.csv")
-    babynames_totals = pd.read_csv("data-raw/babynamesIL_totals.csv")
-    # Load 1948 legacy data if exists
-    try:
-        babynames_1948 = pd.read_csv("data-raw/babynamesIL_1948.csv")
-    except FileNotFoundError:
-        babynames_1948 = None
-    return babynames, babynames_totals, babynames_1948
+DEFAULT_NAME = "נועם"
+
+# Updated sectors (removed "Other", renamed "Christian" to "Christian-Arab")
+SECTORS_EN = ["Jewish", "Muslim", "Christian-Arab", "Druze"]
+SECTORS_HE = ["יהודי", "מוסלמי", "נוצרי-ערבי", "דרוזי"]
+
+# Number of most popular names per sector whose charts are rendered on startup
+WARM_CHARTS = int(os.environ.get("BABYNAMES_WARM_CHARTS", "0"))
+
+
+def load_data(datasets=None):
+    # Tables use the compact schema of data_cache.py (shared name dictionary)
+    # and are read from the binary cache in data-raw/cache when it is fresh.
+    # Only the main tables are loaded here; the 1948 legacy data is loaded by
+    # the registry the first time it is included.
+    if datasets is None:
+        datasets = DatasetRegistry()
+    babynames, babynames_totals = datasets.load(*MAIN_DATASETS)
+    return babynames, babynames_totals
+
+
+def data_version(paths=tuple(DATASETS.values())):
+    """Fingerprint of the data files from their size and modification time.
+
+    Cheap enough to compute on every rerun (one stat per file), and changes
+    whenever a data file is replaced.
+    """
+    stats = []
+    for path in paths:
+        if os.path.exists(path):
+            info = os.stat(path)
+            stats.append((path, info.st_size, info.st_mtime_ns))
+    return hashlib.sha1(repr(stats).encode("utf-8")).hexdigest()[:12]
+
+
+class DataContext:
+    """The data tables and everything derived from them, built once per version.
+
+    A single instance is shared by all sessions of the process (see
+    get_data_context), so reruns neither hash nor copy the tables. The time
+    each part took to build is kept in ``build_timings`` for the debug panel.
+    """
+
+    # Number of contexts built by this process; tells a rerun whether it
+    # built the context or found it in the cache
+    builds = 0
+
+    def __init__(self, version):
+        DataContext.builds += 1
+        build = Trace()
+        self.version = version
+        self.datasets = DatasetRegistry()
+        with build.stage("load_data"):
+            self.babynames, self.babynames_totals = load_data(self.datasets)
+        with build.stage("process_data"):
+            self.names_by_sector = process_data(self.babynames)
+        with build.stage("highlights"):
+            self.highlights = load_highlights(self.babynames, self.babynames_totals)
+        with build.stage("search_index"):
+            self.name_search = build_search_indexes(self.babynames_totals)
+        with build.stage("series_store"):
+            self.babynames_store = self.datasets.store("babynames")
+        with build.stage("trajectory_index"):
+            self.trajectories = TrajectoryIndex(self.babynames_store)
+        with build.stage("analytics"):
+            self.analytics = AnalyticsCube(load_analytics(self.babynames))
+        # Chart specs depend on the data, so they live and die with it
+        self.chart_cache = ChartCache()
+        if WARM_CHARTS:
+            with build.stage("warm_charts"):
+                warm_chart_cache(self, WARM_CHARTS)
+        self.build_timings = build.stages
+
+
+@st.cache_resource(max_entries=1)
+def get_data_context(version):
+    return DataContext(version)
 
 
-@st.cache_data
 def process_data(babynames):
     names_by_sector = (
         babynames[["sector", "name"]]
         .drop_duplicates()
-        .groupby(["sector"])["name"]
+        .groupby(["sector"], observed=True)["name"]
         .apply(list)
         .to_dict()
     )
     return names_by_sector
 
 
-@st.cache_data
-def compute_2024_highlights(babynames, babynames_totals):
-    """Pre-compute 2024 highlights for interactive filtering."""
-    highlights = {}
-
-    # Get 2023 and 2024 data for comparison
-    recent = babynames[babynames["year"].isin([2023, 2024])].copy()
-
-    # Calculate year-over-year changes
-    pivot = recent.pivot_table(
-        index=["sector", "sex", "name"],
-        columns="year",
-        values=["n", "prop"],
-        fill_value=0,
-    ).reset_index()
-
-    pivot.columns = [
-        "_".join(map(str, col)).strip("_") if isinstance(col, tuple) else col
-        for col in pivot.columns
-    ]
+def prepare_plot_data(
+    babynames_store,
+    sector,
+    name,
+    include_1948=False,
+    babynames_1948_store=None,
+    year_range=None,
+):
+    years = babynames_store.years
+    series = babynames_store.get(sector, name)
+    if series is None:
+        n = np.zeros((len(years), len(SEXES)), dtype=np.int32)
+        prop = np.zeros((len(years), len(SEXES)), dtype=np.float32)
+        rank = np.zeros((len(years), len(SEXES)), dtype=np.int32)
+    else:
+        n, prop, rank = series
+
+    # Prepend 1948 data if requested and available
+    if include_1948 and babynames_1948_store is not None:
+        # Sectors of the legacy data are normalized when it is loaded
+        series_1948 = babynames_1948_store.get(sector, name)
+        if series_1948 is not None:
+            years = np.concatenate([babynames_1948_store.years, years])
+            n = np.concatenate([series_1948[0], n])
+            prop = np.concatenate([series_1948[1], prop])
+            rank = np.concatenate([series_1948[2], rank])
+
+    if year_range is not None:
+        in_range = (years >= year_range[0]) & (years <= year_range[1])
+        years, n, prop, rank = (
+            years[in_range],
+            n[in_range],
+            prop[in_range],
+            rank[in_range],
+        )
 
-    if "n_2023" in pivot.columns and "n_2024" in pivot.columns:
-        pivot["prop_change"] = pivot.get("prop_2024", 0) - pivot.get("prop_2023", 0)
-        pivot["n_2024"] = pivot.get("n_2024", 0)
-        pivot["n_2023"] = pivot.get("n_2023", 0)
+    return series_frame(years, n, prop, rank)
 
-        # Rising names (positive proportion change)
-        highlights["rising"] = (
-            pivot[pivot["prop_change"] > 0.001]
-            .nlargest(50, "prop_change")
-            .copy()
-        )
 
-        # Falling names (negative proportion change)
-        highlights["falling"] = (
-            pivot[pivot["prop_change"] < -0.001]
-            .nsmallest(50, "prop_change")
-            .copy()
-        )
+def get_total_counts(
+    babynames_store,
+    sector,
+    name,
+    babynames_1948_store=None,
+    include_1948=False,
+    year_range=None,
+):
+    start_year, end_year = year_range if year_range is not None else (None, None)
+    totals = babynames_store.totals(sector, name, start_year, end_year)
 
-        # Stable names (small change but in top 100)
-        highlights["stable"] = (
-            pivot[(abs(pivot["prop_change"]) < 0.001) & (pivot["n_2024"] > 50)]
-            .nlargest(50, "n_2024")
-            .copy()
+    # Add 1948 counts if requested
+    if include_1948 and babynames_1948_store is not None:
+        totals = totals + babynames_1948_store.totals(
+            sector, name, start_year, end_year
         )
 
-        # New to top 100 (in 2024 but not in 2023 top 100)
-        highlights["new"] = (
-            pivot[(pivot["n_2023"] < 10) & (pivot["n_2024"] >= 50)]
-            .nlargest(50, "n_2024")
-            .copy()
+    totals = dict(zip(SEXES, totals))
+    return int(totals["M"]), int(totals["F"])
+
+
+def prepare_comparison_data(
+    babynames_store,
+    pairs,
+    include_1948=False,
+    babynames_1948_store=None,
+    year_range=None,
+):
+    """Gap-filled series of several (sector, name) pairs in one long-form frame."""
+    years = babynames_store.years
+    n, prop, rank = babynames_store.get_many(pairs)
+
+    if include_1948 and babynames_1948_store is not None:
+        n_1948, prop_1948, rank_1948 = babynames_1948_store.get_many(pairs)
+        years = np.concatenate([babynames_1948_store.years, years])
+        n = np.concatenate([n_1948, n], axis=1)
+        prop = np.concatenate([prop_1948, prop], axis=1)
+        rank = np.concatenate([rank_1948, rank], axis=1)
+
+    if year_range is not None:
+        in_range = (years >= year_range[0]) & (years <= year_range[1])
+        years, n, prop, rank = (
+            years[in_range],
+            n[:, in_range],
+            prop[:, in_range],
+            rank[:, in_range],
         )
 
-    # Popularity-based filters using totals
-    data_2024 = babynames[babynames["year"] == 2024].copy()
-
-    for sector in data_2024["sector"].unique():
-        for sex in ["M", "F"]:
-            key = f"{sector}_{sex}"
-            sector_sex_data = data_2024[
-                (data_2024["sector"] == sector) & (data_2024["sex"] == sex)
-            ].copy()
+    return comparison_frame(pairs, years, n, prop, rank)
 
-            if not sector_sex_data.empty:
-                highlights[f"top10_{key}"] = sector_sex_data.nlargest(10, "n")
-                highlights[f"top50_{key}"] = sector_sex_data.nlargest(50, "n")
 
-    # Rare names from totals
-    if babynames_totals is not None:
-        highlights["rare"] = babynames_totals[babynames_totals["total"] < 100].copy()
+def y_encoding(stat, t):
+    """Y axis of a statistic; ranks are drawn with the first rank on top."""
+    if stat == "n":
+        return alt.Y("n:Q", axis=alt.Axis(title=t["babies_axis"]))
+    if stat == "rank":
+        return alt.Y(
+            "rank:Q",
+            axis=alt.Axis(title=t["rank"], format="i"),
+            scale=alt.Scale(reverse=True, zero=False),
+        )
+    return alt.Y("prop:Q", axis=alt.Axis(format=".2%", title=t["percent_axis"]))
 
-    return highlights
 
+def get_comparison_chart(data, stat, t, year_range):
+    """Overlay of several names: one color per name, one dash style per sex."""
+    hover = alt.selection_point(fields=["year"], nearest=True, on="mouseover")
 
-def create_full_year_sex_df(start_year, end_year):
-    return pd.DataFrame(
-        [[y, s] for y in range(start_year, end_year + 1) for s in ["M", "F"]],
-        columns=["year", "sex"],
+    lines = (
+        alt.Chart(data)
+        .mark_line()
+        .encode(
+            alt.X(
+                "year",
+                axis=alt.Axis(title=t["year_axis"], format="i"),
+                scale=alt.Scale(domain=year_range),
+            ),
+            y_encoding(stat, t),
+            color=alt.Color("name:N", legend=alt.Legend(title=t["name"])),
+            strokeDash=alt.StrokeDash(
+                "sex:N",
+                legend=alt.Legend(
+                    title=t["sex"],
+                    labelExpr="datum.label == 'M' ? '"
+                    + t["male"]
+                    + "' : '"
+                    + t["female"]
+                    + "'",
+                ),
+            ),
+        )
     )
 
+    points = (
+        lines.transform_filter(hover)
+        .mark_circle(size=65)
+        .encode(
+            tooltip=[
+                alt.Tooltip("name", title=t["name"]),
+                alt.Tooltip("year", title=t["year"]),
+                alt.Tooltip("sex", title=t["sex"]),
+                alt.Tooltip("n", title=t["total_number"]),
+                alt.Tooltip("prop:Q", title=t["percent_in_year"], format=".2%"),
+                alt.Tooltip("rank:Q", title=t["rank"]),
+            ]
+        )
+    )
 
-def prepare_plot_data(babynames, sector, name, include_1948=False, babynames_1948=None):
-    # Filter main data
-    lineplot_data = babynames[(babynames.sector == sector) & (babynames.name == name)][
-        ["year", "sex", "n", "prop"]
-    ].copy()
-
-    # Add 1948 data if requested and available
-    if include_1948 and babynames_1948 is not None:
-        # Map sector name for 1948 data (Christian-Arab -> Christian for legacy data)
-        sector_1948 = "Christian" if sector == "Christian-Arab" else sector
-        data_1948 = babynames_1948[
-            (babynames_1948.sector == sector_1948) & (babynames_1948.name == name)
-        ][["year", "sex", "n", "prop"]]
-        if not data_1948.empty:
-            lineplot_data = pd.concat([data_1948, lineplot_data], ignore_index=True)
-
-    if lineplot_data.empty:
-        return pd.DataFrame(columns=["year", "sex", "n", "prop"])
+    rule = (
+        alt.Chart(data)
+        .mark_rule()
+        .encode(
+            x="year",
+            opacity=alt.condition(hover, alt.value(0.3), alt.value(0)),
+        )
+        .add_params(hover)
+    )
 
-    year_range = (int(lineplot_data.year.min()), int(lineplot_data.year.max()))
-    all_combinations = create_full_year_sex_df(*year_range)
     return (
-        lineplot_data.merge(all_combinations, on=["year", "sex"], how="outer")
-        .fillna(0)
-        .sort_values(["sex", "year"])
+        (lines + points + rule)
+        .interactive()
+        .configure_legend(padding=10, cornerRadius=10, orient="bottom")
+        .properties(height=600)
     )
 
 
-def get_total_counts(babynames_totals, sector, name, babynames_1948=None, include_1948=False):
-    total_data = babynames_totals[
-        (babynames_totals.sector == sector) & (babynames_totals.name == name)
-    ]
-    total_male = total_data[total_data.sex == "M"]["total"].sum()
-    total_female = total_data[total_data.sex == "F"]["total"].sum()
-
-    # Add 1948 counts if requested
-    if include_1948 and babynames_1948 is not None:
-        sector_1948 = "Christian" if sector == "Christian-Arab" else sector
-        data_1948 = babynames_1948[
-            (babynames_1948.sector == sector_1948) & (babynames_1948.name == name)
-        ]
-        total_male += data_1948[data_1948.sex == "M"]["n"].sum()
-        total_female += data_1948[data_1948.sex == "F"]["n"].sum()
-
-    return int(total_male), int(total_female)
-
-
-def get_line_chart(data, name, stat, t, include_1948=False):
+def get_line_chart(data, name, stat, t, include_1948=False, year_range=None):
     hover = alt.selection_point(
         fields=["year"],
         nearest=True,
@@ -265,9 +420,12 @@ def get_line_chart(data, name, stat, t, include_1948=False):
 
     color_scale = alt.Scale(domain=["M", "F"], range=["red", "blue"])
 
-    # Dynamic year range based on 1948 toggle
-    min_year = 1948 if include_1948 else 1949
-    max_year = 2024
+    # Dynamic year range based on the year slider and the 1948 toggle
+    if year_range is not None:
+        min_year, max_year = year_range
+    else:
+        min_year = 1948 if include_1948 else 1949
+        max_year = 2024
 
     lines = (
         alt.Chart(data, title=f"{t['name_prefix']} {name} {t['name_suffix']}")
@@ -278,13 +436,7 @@ def get_line_chart(data, name, stat, t, include_1948=False):
                 axis=alt.Axis(title=t["year_axis"], format="i"),
                 scale=alt.Scale(domain=(min_year, max_year)),
             ),
-            (
-                alt.Y("n:Q", axis=alt.Axis(title=t["babies_axis"]))
-                if stat == "n"
-                else alt.Y(
-                    "prop:Q", axis=alt.Axis(format=".2%", title=t["percent_axis"])
-                )
-            ),
+            y_encoding(stat, t),
             color=alt.Color(
                 "sex:N",
                 scale=color_scale,
@@ -317,6 +469,7 @@ def get_line_chart(data, name, stat, t, include_1948=False):
                 alt.Tooltip("sex", title=t["sex"]),
                 alt.Tooltip("n", title=t["total_number"]),
                 alt.Tooltip("prop:Q", title=t["percent_in_year"], format=".2%"),
+                alt.Tooltip("rank:Q", title=t["rank"]),
             ],
         )
         .add_params(hover)
@@ -332,9 +485,109 @@ def get_line_chart(data, name, stat, t, include_1948=False):
     return chart
 
 
-def render_highlights_section(t, highlights, current_sector, lang):
-    """Render the 2024 Highlights section with tabs."""
-    st.subheader(t["highlights_2024"])
+def get_chart_spec(
+    data, sector, name, compared, stat, lang, include_1948, year_range, trace=NULL_TRACE
+):
+    """Vega-Lite spec of the main chart, built once per key and then cached."""
+    key = (sector, name, tuple(compared), stat, lang, include_1948, year_range)
+    built = []
+
+    def build():
+        built.append(key)
+        t = translations[lang]
+        # The 1948 data is only loaded once a session includes it
+        babynames_1948_store = data.datasets.store("1948") if include_1948 else None
+        if compared:
+            with trace.stage("prepare_comparison_data"):
+                comparison_data = prepare_comparison_data(
+                    data.babynames_store,
+                    [(sector, n) for n in [name] + list(compared)],
+                    include_1948,
+                    babynames_1948_store,
+                    year_range,
+                )
+            with trace.stage("get_comparison_chart"):
+                return chart_spec(
+                    get_comparison_chart(comparison_data, stat, t, year_range)
+                )
+        with trace.stage("prepare_plot_data"):
+            lineplot_data = prepare_plot_data(
+                data.babynames_store,
+                sector,
+                name,
+                include_1948,
+                babynames_1948_store,
+                year_range,
+            )
+        with trace.stage("get_line_chart"):
+            return chart_spec(
+                get_line_chart(lineplot_data, name, stat, t, include_1948, year_range)
+            )
+
+    spec = data.chart_cache.get_or_create(key, build)
+    trace.count("chart_cache_miss" if built else "chart_cache_hit")
+    return spec
+
+
+def warm_chart_cache(data, top_n):
+    """Render the charts of the ``top_n`` most popular names of every sector.
+
+    Only the default view is rendered (full year range, no 1948 data, no
+    comparison), for both statistics and both languages.
+    """
+    years = data.babynames_store.years
+    year_range = (int(years[0]), int(years[-1]))
+    for sector, search_index in data.name_search.items():
+        # An empty query matches every name, most popular first
+        for name in search_index.search("", k=top_n):
+            for stat in ["n", "prop"]:
+                for lang in translations:
+                    get_chart_spec(
+                        data, sector, name, [], stat, lang, False, year_range
+                    )
+
+
+def render_similar_names(t, trajectories, sector, name, default_sex, lang):
+    """Table of the names whose popularity curve is most similar to ``name``."""
+    sexes = [sex for sex in ["M", "F"] if (sector, sex, name) in trajectories]
+    if not sexes:
+        return
+    if lang == "Hebrew":
+        st.markdown(
+            f'<h3 class="rtl">{t["similar_names"]}{name}</h3>', unsafe_allow_html=True
+        )
+    else:
+        st.subheader(f"{t['similar_names']} {name}")
+    sex = sexes[0]
+    if len(sexes) > 1:
+        labels = {"M": t["male"], "F": t["female"]}
+        sex = st.radio(
+            t["sex"],
+            sexes,
+            index=sexes.index(default_sex),
+            format_func=labels.get,
+            horizontal=True,
+            key="similar_sex",
+        )
+    similar = trajectories.similar(sector, sex, name)
+    st.dataframe(
+        pd.DataFrame(
+            {
+                t["name"].strip(":"): [other for other, _ in similar],
+                t["similarity"]: [score for _, score in similar],
+            }
+        ),
+        column_config={t["similarity"]: st.column_config.NumberColumn(format="%.2f")},
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+def render_highlights_section(t, highlights, babynames_store, current_sector, lang):
+    """Render the Highlights section for a selectable year with tabs."""
+    years = [int(year) for year in babynames_store.years[::-1]]
+    year = st.selectbox(t["highlights_year"], years, index=0, key="highlights_year")
+    st.subheader(f"{t['highlights']} {year}")
 
     tab1, tab2 = st.tabs([t["trend_filter"], t["popularity_filter"]])
 
@@ -353,30 +606,19 @@ def render_highlights_section(t, highlights, current_sector, lang):
         }
 
         trend_key = trend_map.get(trend_option, "rising")
-        if trend_key in highlights and not highlights[trend_key].empty:
-            df = highlights[trend_key]
-            # Filter by current sector if possible
-            if "sector" in df.columns:
-                df = df[df["sector"] == current_sector]
-
-            if not df.empty:
-                display_cols = ["name", "sex"]
-                if "n_2024" in df.columns:
-                    display_cols.append("n_2024")
-                if "prop_change" in df.columns:
-                    df = df.copy()
-                    df["prop_change_pct"] = (df["prop_change"] * 100).round(3)
-                    display_cols.append("prop_change_pct")
-
-                st.dataframe(
-                    df[display_cols].head(20),
-                    use_container_width=True,
-                    hide_index=True,
-                )
-            else:
-                st.info("No data for this sector/filter combination.")
+        df = select_highlights(highlights, trend_key, year, current_sector)
+        if not df.empty:
+            # Both sexes of the sector, ordered like the per-sex tables
+            sort_col = "prop_change" if trend_key in ("rising", "falling") else "n"
+            df = df.sort_values(sort_col, ascending=trend_key == "falling").copy()
+            df["prop_change_pct"] = (df["prop_change"] * 100).round(3)
+            st.dataframe(
+                df[["name", "sex", "n", "prop_change_pct"]].head(20),
+                use_container_width=True,
+                hide_index=True,
+            )
         else:
-            st.info("No data available for this filter.")
+            st.info("No data for this sector/filter combination.")
 
     with tab2:
         col1, col2 = st.columns(2)
@@ -415,9 +657,11 @@ def render_highlights_section(t, highlights, current_sector, lang):
                 else:
                     st.info("No rare names for this sector/sex.")
         else:
-            key = f"{pop_key}_{current_sector}_{sex_code}"
-            if key in highlights and not highlights[key].empty:
-                df = highlights[key]
+            # The top names are a slice of the precomputed rank order
+            df = babynames_store.top(
+                current_sector, year, sex_code, 10 if pop_key == "top10" else 50
+            )
+            if not df.empty:
                 st.dataframe(
                     df[["name", "n", "prop"]].head(30),
                     use_container_width=True,
@@ -427,7 +671,145 @@ def render_highlights_section(t, highlights, current_sector, lang):
                 st.info("No data for this filter combination.")
 
 
+def get_analytics_chart(metrics, metric, t):
+    """One metric of a sector over the years, a line per sex."""
+    share = metric.endswith("_share")
+    return (
+        alt.Chart(metrics)
+        .mark_line(point=alt.OverlayMarkDef(size=20))
+        .encode(
+            alt.X("year", axis=alt.Axis(title=t["year_axis"], format="i")),
+            alt.Y(
+                f"{metric}:Q",
+                axis=alt.Axis(title=t[metric], format=".0%" if share else "~g"),
+                scale=alt.Scale(zero=share),
+            ),
+            color=alt.Color(
+                "sex:N",
+                scale=alt.Scale(domain=["M", "F"], range=["red", "blue"]),
+                legend=alt.Legend(
+                    title=t["sex"],
+                    labelExpr="datum.label == 'M' ? '"
+                    + t["male"]
+                    + "' : '"
+                    + t["female"]
+                    + "'",
+                    orient="bottom",
+                    direction="horizontal",
+                    titleOrient="left",
+                ),
+            ),
+            tooltip=[
+                alt.Tooltip("year", title=t["year"]),
+                alt.Tooltip("sex", title=t["sex"]),
+                alt.Tooltip(
+                    f"{metric}:Q", title=t[metric], format=".1%" if share else ".3~f"
+                ),
+                alt.Tooltip("babies:Q", title=t["total_number"]),
+            ],
+        )
+        .properties(height=400)
+        .interactive()
+    )
+
+
+def render_analytics(t, data, lang):
+    """Diversity of the names of a sector over the years, from the analytics cube."""
+    cube = data.analytics
+    col1, col2 = st.columns((2, 3))
+    labels = dict(zip(SECTORS_EN, SECTORS_EN if lang == "English" else SECTORS_HE))
+    with col1:
+        sector = st.selectbox(
+            t["sector"], SECTORS_EN, format_func=labels.get, key="analytics_sector"
+        )
+    with col2:
+        metric = st.selectbox(
+            t["metric"], METRICS, format_func=t.get, key="analytics_metric"
+        )
+
+    # The chart depends on the cube only, so it is cached with the data
+    spec = data.chart_cache.get_or_create(
+        ("analytics", sector, metric, lang),
+        lambda: chart_spec(get_analytics_chart(cube.sector_metrics(sector), metric, t)),
+    )
+    st.vega_lite_chart(spec=spec, use_container_width=True)
+
+    year = st.selectbox(
+        t["highlights_year"], cube.years[::-1], index=0, key="analytics_year"
+    )
+    if lang == "Hebrew":
+        st.markdown(
+            f'<h3 class="rtl">{t["unisex_in"]}{year}</h3>', unsafe_allow_html=True
+        )
+    else:
+        st.subheader(f"{t['unisex_in']} {year}")
+    unisex = cube.unisex_names(sector, year)
+    if unisex.empty:
+        st.info(t["no_unisex"])
+        return
+    st.dataframe(
+        pd.DataFrame(
+            {
+                t["name"].strip(":"): unisex["name"].astype(str),
+                t["female"]: unisex["n_F"],
+                t["male"]: unisex["n_M"],
+                t["male_share"]: unisex["male_share"],
+                t["mf_ratio"]: unisex["mf_ratio"],
+            }
+        ),
+        column_config={
+            t["male_share"]: st.column_config.ProgressColumn(
+                format="%.2f", min_value=0, max_value=1
+            ),
+            t["mf_ratio"]: st.column_config.NumberColumn(format="%.2f"),
+        },
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+def debug_enabled():
+    return DEBUG or st.query_params.get("debug") == "1"
+
+
+def render_debug_panel(history, data):
+    """Sidebar panel with the stage timings of the session's last reruns."""
+    with st.sidebar.expander("Debug", expanded=True):
+        st.caption(f"Last {len(history)} reruns, stage times in ms")
+        rows = [
+            {
+                "time": record["time"],
+                "total": record["total_ms"],
+                **record["stages"],
+                **record["counters"],
+            }
+            for record in reversed(history)
+        ]
+        st.dataframe(pd.DataFrame(rows).round(2), hide_index=True)
+        if data is not None:
+            st.caption(f"Data context {data.version}, build times in ms")
+            st.json({k: round(v, 2) for k, v in data.build_timings.items()})
+            st.caption("Chart cache")
+            st.json(data.chart_cache.stats())
+
+
 def main():
+    trace = Trace() if debug_enabled() else NULL_TRACE
+    data = None
+    try:
+        data = render_app(trace)
+    finally:
+        if trace.enabled:
+            record = trace.finish()
+            write_trace(record)
+            history = st.session_state.setdefault("debug_history", [])
+            history.append(record)
+            del history[:-HISTORY]
+            render_debug_panel(history, data)
+
+
+def render_app(trace=NULL_TRACE):
+    """The page itself; returns the data context once it is loaded."""
     st.set_page_config(
         layout="centered", page_icon="🍼", page_title="Israeli baby names"
     )
@@ -450,55 +832,113 @@ def main():
     else:
         st.title(t["title"])
 
-    babynames, babynames_totals, babynames_1948 = load_data()
-    names_by_sector = process_data(babynames)
-    highlights = compute_2024_highlights(babynames, babynames_totals)
+    builds = DataContext.builds
+    with trace.stage("data_context"):
+        data = get_data_context(data_version())
+    if DataContext.builds != builds:
+        trace.count("data_context_miss")
+        trace.add_stages(data.build_timings, prefix="data_context.")
+    else:
+        trace.count("data_context_hit")
+
+    names_tab, analytics_tab = st.tabs([t["names_tab"], t["analytics_tab"]])
+    with names_tab:
+        render_name_explorer(t, data, lang, include_1948, trace)
+    with analytics_tab:
+        with trace.stage("analytics"):
+            render_analytics(t, data, lang)
+
+    return data
 
+
+def render_name_explorer(t, data, lang, include_1948, trace=NULL_TRACE):
+    """Search, chart and totals of a name, with the names that trended like it."""
     col1, col2 = st.columns((3, 2))
-    # Updated sectors (removed "Other", renamed "Christian" to "Christian-Arab")
-    sectors_en = ["Jewish", "Muslim", "Christian-Arab", "Druze"]
-    sectors_he = ["יהודי", "מוסלמי", "נוצרי-ערבי", "דרוזי"]
-    sectors = sectors_en if lang == "English" else sectors_he
+    sectors = SECTORS_EN if lang == "English" else SECTORS_HE
 
     with col1:
         sector = st.selectbox(t["sector"], sectors, index=0)
     with col2:
         stat = st.radio(
-            t["statistic"], [t["total_number"], t["percent_in_year"]], index=1
+            t["statistic"],
+            [t["total_number"], t["percent_in_year"], t["rank"]],
+            index=1,
         )
 
     # Map Hebrew sector names to English for indexing
     sector_index = (
-        sectors_he.index(sector) if lang == "Hebrew" else sectors_en.index(sector)
+        SECTORS_HE.index(sector) if lang == "Hebrew" else SECTORS_EN.index(sector)
     )
-    current_sector = sectors_en[sector_index]
-
-    current_names = names_by_sector.get(current_sector, [])
-
-    default_index = current_names.index("נועם") if "נועם" in current_names else 0
-
-    name = st.selectbox(t["name"], current_names, index=default_index)
-
-    stat = "n" if stat == t["total_number"] else "prop"
-    lineplot_data = prepare_plot_data(
-        babynames, current_sector, name, include_1948, babynames_1948
+    current_sector = SECTORS_EN[sector_index]
+
+    # Only the top matches of the search are sent to the browser
+    query = st.text_input(t["search"], value="")
+    search_index = data.name_search.get(current_sector)
+    with trace.stage("search"):
+        current_names = search_index.search(query) if search_index is not None else []
+    if not query and search_index is not None and DEFAULT_NAME in search_index:
+        # Preselect the default name before anything is typed
+        others = [n for n in current_names if n != DEFAULT_NAME]
+        current_names = [DEFAULT_NAME] + others[: MAX_MATCHES - 1]
+    if not current_names:
+        st.info(t["no_matches"])
+        return
+
+    name = st.selectbox(t["name"], current_names, index=0)
+
+    # Names kept across searches so typing a new query does not drop them;
+    # names not given in the sector are dropped when the sector changes
+    compared = [
+        n
+        for n in st.session_state.get("compare_names", [])
+        if n != name and n in search_index
+    ]
+    compare_options = compared + [
+        n for n in current_names if n != name and n not in compared
+    ]
+    compared = st.multiselect(
+        t["compare"], compare_options, default=compared, key="compare_names"
     )
-    total_male, total_female = get_total_counts(
-        babynames_totals, current_sector, name, babynames_1948, include_1948
+
+    first_year = 1948 if include_1948 else int(data.babynames_store.years[0])
+    last_year = int(data.babynames_store.years[-1])
+    start_year, end_year = st.slider(
+        t["year_range"], first_year, last_year, (first_year, last_year)
     )
 
-    st.altair_chart(
-        get_line_chart(lineplot_data, name, stat, t, include_1948),
-        use_container_width=True,
+    stat = {t["total_number"]: "n", t["percent_in_year"]: "prop", t["rank"]: "rank"}[
+        stat
+    ]
+    with trace.stage("get_total_counts"):
+        total_male, total_female = get_total_counts(
+            data.babynames_store,
+            current_sector,
+            name,
+            data.datasets.store("1948") if include_1948 else None,
+            include_1948,
+            (start_year, end_year),
+        )
+
+    spec = get_chart_spec(
+        data,
+        current_sector,
+        name,
+        compared,
+        stat,
+        lang,
+        include_1948,
+        (start_year, end_year),
+        trace,
     )
+    with trace.stage("render_chart"):
+        st.vega_lite_chart(spec=spec, use_container_width=True)
 
     # Year range text
-    start_year = 1948 if include_1948 else 1949
-    year_range_text = f"{start_year} to 2024"
+    year_range_text = f"{start_year} to {end_year}"
 
     if lang == "Hebrew":
         st.markdown(
-            f'<div class="rtl">היו <span style="color: red;">{total_male}</span> תינוקות זכרים ו-<span style="color: blue;">{total_female}</span> תינוקות נקבות בשם <span style="color: green;">{name}</span> משנת {start_year} עד 2024.</div>',
+            f'<div class="rtl">היו <span style="color: red;">{total_male}</span> תינוקות זכרים ו-<span style="color: blue;">{total_female}</span> תינוקות נקבות בשם <span style="color: green;">{name}</span> משנת {start_year} עד {end_year}.</div>',
             unsafe_allow_html=True,
         )
         st.markdown(
@@ -514,9 +954,21 @@ def main():
             unsafe_allow_html=True,
         )
 
+    with trace.stage("similar_names"):
+        render_similar_names(
+            t,
+            data.trajectories,
+            current_sector,
+            name,
+            "M" if total_male >= total_female else "F",
+            lang,
+        )
+
     # Temporarily disable 2024 Highlights section (data under review)
     # st.markdown("---")
-    # render_highlights_section(t, highlights, current_sector, lang)
+    # render_highlights_section(
+    #     t, data.highlights, data.babynames_store, current_sector, lang
+    # )
 
 
 if __name__ == "__main__":
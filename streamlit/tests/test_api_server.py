@@ -0,0 +1,186 @@
+"""Tests of api_server.py, its helpers and a server on the repository's data.
+
+Run from the repository root:
+
+    python -m pytest streamlit/tests
+"""
+
+import gzip
+import http.client
+import json
+import os
+import sys
+import threading
+from urllib.parse import urlencode
+
+import pytest
+
+STREAMLIT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+REPO_DIR = os.path.join(STREAMLIT_DIR, "..")
+sys.path.insert(0, STREAMLIT_DIR)
+
+from api_server import accepts_gzip, etag_matches, make_server  # noqa: E402
+from datasets import DATASETS, MAIN_DATASETS  # noqa: E402
+from lru_cache import LRUCache  # noqa: E402
+
+SERIES = "/series?" + urlencode({"sector": "Jewish", "name": "נועם"})
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, False),
+        ("", False),
+        ("gzip", True),
+        ("deflate, GZIP", True),
+        ("*", True),
+        ("gzip;q=0.5", True),
+        ("gzip;q=0", False),
+        ("gzip;q=0.000", False),
+        ("br, *;q=0", False),
+        # Malformed weights do not allow the coding, and do not raise
+        ("gzip;q=abc", False),
+        ("gzip;q=", False),
+        ("gzip;q=abc, *", True),
+    ],
+)
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.get_or_create("a", lambda: 1)
+    cache.get_or_create("b", lambda: 2)
+    assert cache.get_or_create("a", lambda: -1) == 1
+    cache.get_or_create("c", lambda: 3)
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.stats() == {
+        "size": 2,
+        "maxsize": 2,
+        "hits": 1,
+        "misses": 3,
+        "evictions": 1,
+    }
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, False),
+        ('"abc"', True),
+        ('"other", "abc"', True),
+        ("*", True),
+        ('W/"abc"', True),
+        ('"abc-gz"', False),
+        ('W/"other"', False),
+    ],
+)
+def test_etag_matches_weakly(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+@pytest.fixture(scope="module")
+def port():
+    """A server on a free port, answering from the repository's data."""
+    if not all(
+        os.path.exists(os.path.join(REPO_DIR, DATASETS[name])) for name in MAIN_DATASETS
+    ):
+        pytest.skip("main CSVs not in this checkout")
+    # The app opens its tables relative to the repository root
+    cwd = os.getcwd()
+    os.chdir(REPO_DIR)
+    try:
+        server = make_server(port=0)
+    finally:
+        os.chdir(cwd)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_port
+    server.shutdown()
+    server.server_close()
+
+
+def get(port, path, headers=None, method="GET"):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request(method, path, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, response.headers, response.read()
+    finally:
+        conn.close()
+
+
+def test_endpoints(port):
+    status, headers, body = get(port, "/sectors")
+    assert status == 200
+    assert headers["Content-Type"] == "application/json; charset=utf-8"
+    assert "Jewish" in json.loads(body)["sectors"]
+
+    names = json.loads(
+        get(port, "/names?" + urlencode({"sector": "Jewish", "q": "נו"}))[2]
+    )
+    assert names["names"] and all(name.startswith("נו") for name in names["names"])
+
+    top = json.loads(get(port, "/top?sector=Jewish&year=2020&sex=M&k=3")[2])["top"]
+    assert [row["rank"] for row in top] == [1, 2, 3]
+
+    assert json.loads(get(port, "/health")[2])["status"] == "ok"
+
+
+@pytest.mark.parametrize(
+    "path, status",
+    [
+        ("/nothing", 404),
+        ("/series?sector=Nowhere&name=x", 400),
+        ("/series?sector=Jewish", 400),
+        ("/top?sector=Jewish&year=abc&sex=M", 400),
+        ("/top?sector=Jewish&year=2020&sex=X", 400),
+        ("/highlights?kind=other&sector=Jewish", 400),
+    ],
+)
+def test_errors(port, path, status):
+    got, headers, body = get(port, path)
+    assert got == status
+    assert headers["Cache-Control"] == "no-store" and "ETag" not in headers
+    assert json.loads(body)["error"]
+
+
+def test_series_ranks_are_integers(port):
+    series = json.loads(get(port, SERIES)[2])["series"]
+    ranks = [row["rank"] for row in series]
+    assert any(rank is None for rank in ranks)
+    assert all(rank is None or type(rank) is int for rank in ranks)
+
+
+def test_gzip_encoding(port):
+    status, headers, plain = get(port, SERIES)
+    assert status == 200 and "Content-Encoding" not in headers
+
+    status, gz_headers, body = get(port, SERIES, {"Accept-Encoding": "gzip"})
+    assert status == 200 and gz_headers["Content-Encoding"] == "gzip"
+    assert int(gz_headers["Content-Length"]) == len(body)
+    assert gzip.decompress(body) == plain
+    assert gz_headers["Vary"] == "Accept-Encoding"
+    assert gz_headers["ETag"] != headers["ETag"]
+
+    status, headers, _ = get(port, SERIES, {"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in headers
+
+
+def test_if_none_match(port):
+    etag = get(port, SERIES)[1]["ETag"]
+    for header in [etag, "W/" + etag, f'"other", {etag}', "*"]:
+        status, headers, body = get(port, SERIES, {"If-None-Match": header})
+        assert status == 304 and body == b""
+        assert headers["ETag"] == etag and "Content-Length" not in headers
+    assert get(port, SERIES, {"If-None-Match": '"other"'})[0] == 200
+    # The ETag of the gzip encoding does not match the plain one
+    gz_etag = get(port, SERIES, {"Accept-Encoding": "gzip"})[1]["ETag"]
+    assert get(port, SERIES, {"If-None-Match": gz_etag})[0] == 200
+
+
+def test_head(port):
+    status, headers, body = get(port, SERIES, method="HEAD")
+    assert status == 200 and body == b""
+    assert int(headers["Content-Length"]) == len(get(port, SERIES)[2])
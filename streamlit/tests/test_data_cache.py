@@ -0,0 +1,82 @@
+"""Tests of data_cache.py. Run from the repository root:
+
+    python -m pytest streamlit/tests
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+STREAMLIT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+REPO_DIR = os.path.join(STREAMLIT_DIR, "..")
+sys.path.insert(0, STREAMLIT_DIR)
+
+from data_cache import build_caches, cached_pickle, pickle_path  # noqa: E402
+from datasets import DATASETS, MAIN_DATASETS, DatasetRegistry  # noqa: E402
+
+PATHS = {name: os.path.join(REPO_DIR, path) for name, path in DATASETS.items()}
+
+
+def frame(values):
+    return pd.DataFrame({"n": values})
+
+
+def test_cached_pickle_reuses_result(tmp_path):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"total": 6}
+
+    frames = [frame([1, 2, 3])]
+    assert cached_pickle("demo", frames, compute, tmp_path) == {"total": 6}
+    assert cached_pickle("demo", frames, compute, tmp_path) == {"total": 6}
+    assert len(calls) == 1
+    assert os.listdir(tmp_path) == [os.path.basename(pickle_path("demo", frames))]
+
+
+def test_cached_pickle_truncated_is_a_miss(tmp_path):
+    frames = [frame([1, 2, 3])]
+    path = pickle_path("demo", frames, tmp_path)
+    cached_pickle("demo", frames, lambda: list(range(1000)), tmp_path)
+    with open(path, "rb") as f:
+        data = f.read()
+    # What a reader would see while another worker is still writing
+    with open(path, "wb") as f:
+        f.write(data[: len(data) // 2])
+
+    assert cached_pickle("demo", frames, lambda: "recomputed", tmp_path) == "recomputed"
+    assert pd.read_pickle(path) == "recomputed"
+
+
+def test_cached_pickle_replaces_stale(tmp_path):
+    old, new = [frame([1, 2, 3])], [frame([1, 2, 4])]
+    cached_pickle("demo", old, lambda: "old", tmp_path)
+    cached_pickle("other", old, lambda: "other", tmp_path)
+    cached_pickle("demo", new, lambda: "new", tmp_path)
+
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        os.path.basename(pickle_path(prefix, frames))
+        for prefix, frames in [("demo", new), ("other", old)]
+    )
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["csv", "cache"])
+def test_tables_match_csv(tmp_path, cached):
+    """Names and counts as in the CSVs, whether read from them or the cache."""
+    if not all(os.path.exists(PATHS[name]) for name in MAIN_DATASETS):
+        pytest.skip("main CSVs not in this checkout")
+    if cached:
+        build_caches(list(PATHS.values()), tmp_path)
+    # Main tables first, as the app loads them; the others adopt their names
+    datasets = DatasetRegistry(PATHS, cache_dir=tmp_path)
+    datasets.load(*MAIN_DATASETS)
+
+    for name, path in PATHS.items():
+        if not os.path.exists(path):
+            continue
+        df, raw = datasets.get(name), pd.read_csv(path)
+        for col in ["name", "sex", "n" if "n" in raw else "total"]:
+            assert (df[col].astype(raw[col].dtype) == raw[col]).all(), (name, col)
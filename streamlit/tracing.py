@@ -0,0 +1,91 @@
+"""Per-stage timings of app reruns, for finding out what makes a rerun slow.
+
+Tracing is off unless the BABYNAMES_DEBUG environment variable is set or the
+page is opened with ``?debug=1``. Untraced reruns use NULL_TRACE, whose
+stages are a shared no-op context manager, so the hooks cost next to nothing.
+When BABYNAMES_TRACE names a file, every traced rerun is also appended to it
+as one JSON line:
+
+    BABYNAMES_TRACE=trace.jsonl streamlit run streamlit/streamlit_app.py
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+DEBUG = bool(os.environ.get("BABYNAMES_DEBUG"))
+TRACE_FILE = os.environ.get("BABYNAMES_TRACE")
+
+# Reruns shown in the debug panel of a session
+HISTORY = 20
+
+_write_lock = threading.Lock()
+
+
+class Trace:
+    """Wall-clock milliseconds per named stage, and counters, of one rerun."""
+
+    enabled = True
+
+    def __init__(self):
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1e3
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def add_stages(self, stages, prefix=""):
+        """Record stages timed elsewhere, e.g. while building a cached object."""
+        for name, elapsed in stages.items():
+            self.stages[prefix + name] = self.stages.get(prefix + name, 0.0) + elapsed
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def finish(self):
+        """The rerun as a JSON-serializable record."""
+        return {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "total_ms": (time.perf_counter() - self.start) * 1e3,
+            "stages": self.stages,
+            "counters": self.counters,
+        }
+
+
+class NullTrace:
+    """Stand-in for Trace when tracing is off; every hook does nothing."""
+
+    enabled = False
+    _stage = nullcontext()
+
+    def stage(self, name):
+        return self._stage
+
+    def add_stages(self, stages, prefix=""):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+def write_trace(record, path=TRACE_FILE):
+    """Append a finished rerun to the JSON-lines trace file, if there is one."""
+    if not path:
+        return
+    line = json.dumps(record, ensure_ascii=False)
+    with _write_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")